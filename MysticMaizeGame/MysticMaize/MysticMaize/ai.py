@@ -0,0 +1,90 @@
+import heapq
+import time
+from collections import deque
+
+FIELD_CHUNK = 256  # Cells of flow field rebuilt per unit of work
+DISTANCE_WEIGHT = 2  # Ticks of staleness that one cell closer to the player is worth
+RATE_WINDOW = 1.0  # Seconds of replans counted for replans_per_second
+OVERRUN_TOLERANCE_US = 250  # How far one unit may run past the budget before it counts as an overrun
+
+
+class AIScheduler:
+    # Enemy pathfinding spread over frames. Enemies that need a new plan
+    # wait in a priority queue, oldest plan first with a head start for
+    # those near the player; flow field rebuilds run in chunks. run() does
+    # queued work until its budget of microseconds is spent and leaves the
+    # rest for later calls, while enemies keep walking their last plan.
+    # A run that leaves work queued is deferred, which is the normal case;
+    # only a unit that ends well past the budget is an overrun.
+    def __init__(self, flow_field):
+        self.flow_field = flow_field
+        self.queue = []
+        self.queued = set()
+        self.sequence = 0
+        self.tick = 0
+        self.turn = 0
+        self.replans = 0
+        self.overruns = 0
+        self.deferred = 0
+        self.runs = 0
+        self.recent = deque()
+
+    def request_field(self, goal_x, goal_y):
+        self.flow_field.request(goal_x, goal_y, FIELD_CHUNK)
+
+    def request(self, enemy):
+        if enemy in self.queued:
+            return
+        distance = self.flow_field.distance(enemy.x, enemy.y)
+        priority = enemy.planned_at + max(distance, 0) * DISTANCE_WEIGHT
+        self.sequence += 1
+        heapq.heappush(self.queue, (priority, self.sequence, enemy))
+        self.queued.add(enemy)
+
+    def run(self, budget_us=None, max_units=None):
+        # Returns the units of work done: one enemy replan or one field chunk.
+        # Without a budget everything queued is done.
+        self.tick += 1
+        start = time.perf_counter()
+        deadline = None if budget_us is None else start + budget_us / 1e6
+        units = 0
+        while self.queue or self.flow_field.building:
+            if max_units is not None and units >= max_units:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            # Field chunks and replans take turns, so neither starves the other
+            self.turn ^= 1
+            if self.flow_field.building and (self.turn or not self.queue):
+                self.flow_field.advance()
+            else:
+                _, _, enemy = heapq.heappop(self.queue)
+                self.queued.discard(enemy)
+                # Enemies shot while queued are dropped here
+                if enemy.is_alive:
+                    enemy.replan(self.flow_field, self.tick)
+                    self.replans += 1
+                    self.recent.append(start)
+            units += 1
+        self.runs += 1
+        # Every unit starts before the deadline, so only the last can end far past it
+        if deadline is not None and time.perf_counter() > deadline + OVERRUN_TOLERANCE_US / 1e6:
+            self.overruns += 1
+        if self.queue or self.flow_field.building:
+            self.deferred += 1
+        return units
+
+    def stats(self):
+        now = time.perf_counter()
+        while self.recent and now - self.recent[0] > RATE_WINDOW:
+            self.recent.popleft()
+        return {
+            "queue": len(self.queue),
+            "replans": self.replans,
+            "replans_per_second": len(self.recent) / RATE_WINDOW,
+            "overruns": self.overruns,
+            "deferred": self.deferred,
+            "runs": self.runs,
+            "field_pending": self.flow_field.building is not None,
+            "field_rebuilds": self.flow_field.rebuilds,
+        }
@@ -0,0 +1,88 @@
+import os
+import json
+from collections import OrderedDict
+
+import pygame
+
+ATLAS_MANIFEST = "atlas.json"  # Written by build_assets.py into the web bundle
+
+
+class AssetManager:
+    # Decodes each image file once, converted to the display pixel format,
+    # and keeps an LRU of scaled copies keyed by (file, size). Load errors
+    # are passed through so callers keep their own placeholders.
+    # When a packed bundle's manifest is present, sprites named in it come
+    # from the one atlas image and sounds resolve to their transcoded files.
+    def __init__(self, max_scaled=64, manifest=ATLAS_MANIFEST):
+        self.max_scaled = max_scaled
+        self.images = {}
+        self.scaled_images = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.atlas_path = None
+        self.atlas = None
+        self.sprites = {}
+        self.sounds = {}
+        if manifest and os.path.exists(manifest):
+            self.load_manifest(manifest)
+
+    def load_manifest(self, path):
+        with open(path) as f:
+            manifest = json.load(f)
+        folder = os.path.dirname(path)
+        self.atlas_path = os.path.join(folder, manifest["image"])
+        self.sprites = {name: pygame.Rect(rect) for name, rect in manifest["sprites"].items()}
+        self.sounds = {name: os.path.join(folder, packed) for name, packed in manifest.get("sounds", {}).items()}
+
+    def exists(self, path):
+        return path in self.sprites or os.path.exists(path)
+
+    def sound(self, path):
+        # Name of the file to load for an original sound file name
+        return self.sounds.get(path, path)
+
+    def image(self, path, alpha=True):
+        key = (path, alpha)
+        surface = self.images.get(key)
+        if surface is None:
+            if path in self.sprites:
+                # The atlas is decoded once, on the first sprite asked for
+                if self.atlas is None:
+                    self.atlas = pygame.image.load(self.atlas_path).convert_alpha()
+                surface = self.atlas.subsurface(self.sprites[path])
+                if not alpha:
+                    surface = surface.convert()
+            else:
+                surface = pygame.image.load(path)
+                surface = surface.convert_alpha() if alpha else surface.convert()
+            self.images[key] = surface
+        return surface
+
+    def scaled(self, path, size, alpha=True):
+        key = (path, tuple(size), alpha)
+        surface = self.scaled_images.get(key)
+        if surface is not None:
+            self.scaled_images.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = pygame.transform.scale(self.image(path, alpha), size)
+        self.scaled_images[key] = surface
+        if len(self.scaled_images) > self.max_scaled:
+            self.scaled_images.popitem(last=False)
+        return surface
+
+    def forget(self, path):
+        for key in [key for key in self.images if key[0] == path]:
+            del self.images[key]
+        for key in [key for key in self.scaled_images if key[0] == path]:
+            del self.scaled_images[key]
+
+    def stats(self):
+        return {
+            "decoded": len(self.images),
+            "atlas_sprites": len(self.sprites),
+            "scaled": len(self.scaled_images),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,195 @@
+import threading
+import time
+
+import pygame
+
+
+class Effect:
+    # How one sound effect is played: at most `voices` copies at once, and no
+    # more often than every `cooldown` seconds, on channels of its group
+    def __init__(self, path, volume=1.0, group="effects", voices=1, cooldown=0.0):
+        self.path = path
+        self.volume = volume
+        self.group = group
+        self.voices = voices
+        self.cooldown = cooldown
+
+
+class AudioManager:
+    # Sound effects are decoded on a background thread and played on channels
+    # reserved per group, so one noisy effect cannot take every channel.
+    # Music changes fade out the old track and fade in the new one from
+    # update(), without waiting inside a frame. Without a mixer it does nothing.
+    # resolve maps a sound's file name to the file actually loaded, such as
+    # its transcoded copy in a packed bundle.
+    def __init__(self, effects, groups, resolve=None):
+        self.effects = effects
+        self.resolve = resolve or (lambda path: path)
+        self.enabled = pygame.mixer.get_init() is not None
+        self.sounds = {}
+        self.decode_ms = {}
+        self.failed = []
+        self.loader = None
+        self.last_played = {}
+        self.counts = {"played": 0, "cooldown": 0, "voice_limit": 0, "stolen": 0, "not_loaded": 0}
+
+        self.groups = {}
+        self.started = {}
+        if self.enabled:
+            total = sum(groups.values())
+            if pygame.mixer.get_num_channels() < total + 2:
+                pygame.mixer.set_num_channels(total + 2)
+            # Reserved channels are never picked by Sound.play() elsewhere
+            pygame.mixer.set_reserved(total)
+            first = 0
+            for group, count in groups.items():
+                self.groups[group] = [pygame.mixer.Channel(i) for i in range(first, first + count)]
+                first += count
+
+        self.music_path = None
+        self.music_volume = 1.0
+        self.music_paused = False
+        self.next_track = None
+        self.fade_start = None
+        self.fade_ms = 0
+
+    def load_async(self):
+        if self.enabled and self.loader is None:
+            self.loader = threading.Thread(target=self.load_all, name="audio-loader", daemon=True)
+            self.loader.start()
+
+    def load_all(self):
+        for name in self.effects:
+            self.load(name)
+
+    def load_steps(self):
+        # For platforms without threads: one decode per step, run by the caller
+        if not self.enabled:
+            return []
+        return [lambda name=name: self.load(name) for name in self.effects]
+
+    def load(self, name):
+        effect = self.effects[name]
+        start = time.perf_counter()
+        try:
+            sound = pygame.mixer.Sound(self.resolve(effect.path))
+        except (pygame.error, FileNotFoundError):
+            print(f"Could not load sound {effect.path}")
+            self.failed.append(name)
+            return
+        sound.set_volume(effect.volume)
+        self.decode_ms[name] = (time.perf_counter() - start) * 1000
+        self.sounds[name] = sound
+
+    def wait_loaded(self, timeout=None):
+        if self.loader:
+            self.loader.join(timeout)
+
+    def play(self, name):
+        # Names without an effect (or not decoded yet) are skipped quietly
+        sound = self.sounds.get(name)
+        if sound is None:
+            if name in self.effects:
+                self.counts["not_loaded"] += 1
+            return False
+        effect = self.effects[name]
+        now = time.perf_counter()
+        if now - self.last_played.get(name, -effect.cooldown) < effect.cooldown:
+            self.counts["cooldown"] += 1
+            return False
+
+        channels = self.groups[effect.group]
+        playing = [channel for channel in channels if channel.get_busy()]
+        if sum(1 for channel in playing if channel.get_sound() is sound) >= effect.voices:
+            self.counts["voice_limit"] += 1
+            return False
+        free = [channel for channel in channels if not channel.get_busy()]
+        if free:
+            channel = free[0]
+        else:
+            # Group is full: cut the voice that has been playing longest
+            channel = min(channels, key=lambda c: self.started.get(c, 0))
+            channel.stop()
+            self.counts["stolen"] += 1
+        channel.play(sound)
+        self.started[channel] = now
+        self.last_played[name] = now
+        self.counts["played"] += 1
+        return True
+
+    def play_music(self, path, volume=1.0, fade_ms=500):
+        if not self.enabled:
+            return
+        if path == self.music_path and self.next_track is None and pygame.mixer.music.get_busy():
+            self.music_volume = volume
+            pygame.mixer.music.set_volume(volume)
+            return
+        self.next_track = (path, volume, fade_ms)
+        self.fade_out(fade_ms)
+
+    def stop_music(self, fade_ms=500):
+        if not self.enabled:
+            return
+        self.next_track = None
+        self.fade_out(fade_ms)
+
+    def fade_out(self, fade_ms):
+        if self.music_path and fade_ms and pygame.mixer.music.get_busy() and not self.music_paused:
+            if self.fade_start is None:
+                self.fade_start = time.perf_counter()
+                self.fade_ms = fade_ms
+        else:
+            self.switch_track()
+
+    def fading(self):
+        return self.fade_start is not None
+
+    def update(self):
+        if self.fade_start is None:
+            return
+        progress = (time.perf_counter() - self.fade_start) * 1000 / self.fade_ms
+        if progress < 1:
+            pygame.mixer.music.set_volume(self.music_volume * (1 - progress))
+        else:
+            self.switch_track()
+
+    def switch_track(self):
+        self.fade_start = None
+        pygame.mixer.music.stop()
+        self.music_path = None
+        if self.next_track is None:
+            return
+        path, volume, fade_ms = self.next_track
+        self.next_track = None
+        try:
+            pygame.mixer.music.load(self.resolve(path))
+        except pygame.error:
+            print(f"Could not load music {path}")
+            return
+        self.music_path = path
+        self.music_volume = volume
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(-1, fade_ms=fade_ms)
+        if self.music_paused:
+            pygame.mixer.music.pause()
+
+    def set_music_paused(self, paused):
+        if not self.enabled or paused == self.music_paused:
+            return
+        self.music_paused = paused
+        if paused:
+            pygame.mixer.music.pause()
+        else:
+            pygame.mixer.music.unpause()
+
+    def stats(self):
+        busy = {group: sum(1 for channel in channels if channel.get_busy())
+                for group, channels in self.groups.items()}
+        return {
+            "loaded": len(self.sounds),
+            "failed": list(self.failed),
+            "decode_ms": sum(self.decode_ms.values()),
+            "busy": busy,
+            "channels": sum(len(channels) for channels in self.groups.values()),
+            **self.counts,
+        }
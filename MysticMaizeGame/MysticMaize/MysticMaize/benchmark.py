@@ -0,0 +1,352 @@
+import os
+import sys
+import json
+import random
+import time
+import gc
+import platform
+import glob
+import argparse
+import statistics
+import subprocess
+
+# Headless: no window and no sound device needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Game assets are loaded relative to this directory
+LAUNCH_DIR = os.getcwd()
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import maze_gen
+from pathfinding import FlowField
+from world import MazeWorld, Enemy, Inputs, PLAYER_SIZE, AI_BUDGET_US, TICK, PLAYING
+from bullets import BulletPool
+
+GRID_SIZES = [21, 51, 101, 201, 501]
+MAZE_SIZES = GRID_SIZES + [1001]
+ENTITY_COUNTS = [3, 10, 100, 1000]
+QUICK_GRID_SIZES = [21, 101]
+QUICK_ENTITY_COUNTS = [3, 100]
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown against the baseline (25%)
+SOAK_TICKS = 5000
+QUICK_SOAK_TICKS = 1000
+# Work per timed call as (amount, unit), for benchmarks also shown as a rate
+RATES = {}
+
+
+def time_op(op, min_time, setup=None):
+    # Average seconds per call of op(), repeated for at least min_time.
+    # setup() runs untimed before each call when op consumes its input.
+    calls = 0
+    total = 0.0
+    while total < min_time:
+        if setup:
+            setup()
+        start = time.perf_counter()
+        op()
+        total += time.perf_counter() - start
+        calls += 1
+    return total / calls
+
+
+def make_world(size, enemies=0, seed=1):
+    world = MazeWorld(2, seed, (size, size))
+    world.enemies = [Enemy(*world.get_random_spawn()) for _ in range(enemies)]
+    world.bullets = BulletPool(max(1000, enemies))
+    # As the game does after building a level
+    gc.collect()
+    return world
+
+
+def fill_bullets(world, bullets):
+    world.bullets.clear()
+    for bullet in bullets:
+        world.bullets.spawn(*bullet)
+
+
+def bench_maze_generation(size, min_time):
+    results = {}
+    for name in maze_gen.ALGORITHMS:
+        key = f"maze_{name}[grid={size}]"
+        results[key] = time_op(lambda: maze_gen.generate(name, size, size, seed=size), min_time)
+        RATES[key] = (size * size, "cells/s")
+    return results
+
+
+def bench_world(level, ticks):
+    # Headless soak: the player wanders and shoots while enemies chase.
+    # Reported per tick; a finished world is replaced with a fresh one.
+    world = MazeWorld(level, seed=level)
+    rng = random.Random(level)
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if tick % 30 == 0:
+            inputs = Inputs(rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1)),
+                            [rng.choice(("up", "down", "left", "right"))])
+        world.step(TICK, inputs)
+        if world.status != PLAYING:
+            world = MazeWorld(level, seed=tick)
+    key = f"world_tick[level={level}]"
+    RATES[key] = (1, "ticks/s")
+    return {key: (time.perf_counter() - start) / ticks}
+
+
+def bench_flow_field(size, min_time):
+    world = make_world(size)
+    cells = [(x, y) for y in range(world.rows) for x in range(world.cols) if world.grid[y][x] == 0]
+    rng = random.Random(size)
+    field = FlowField(world.grid)
+    return {f"flow_field_rebuild[grid={size}]": time_op(lambda: field.rebuild(*rng.choice(cells)), min_time)}
+
+
+def bench_collision(size, min_time):
+    world = make_world(size)
+    rng = random.Random(size)
+    points = [(rng.uniform(1, size - 2), rng.uniform(1, size - 2)) for _ in range(100)]
+
+    def op():
+        for x, y in points:
+            world.wall_map.box_hits_wall(x, y, PLAYER_SIZE, PLAYER_SIZE)
+    return {f"can_move[grid={size}]": time_op(op, min_time) / len(points)}
+
+
+def bench_enemies(size, count, min_time):
+    world = make_world(size, count)
+    world.flow_field.update(*world.player_cell())
+    return {f"enemy_step[grid={size},enemies={count}]": time_op(lambda: world.update_enemies(1 / 60), min_time)}
+
+
+def bench_ai_spikes(size, count, steps=240):
+    # Slowest enemy update while the player walks, so the flow field keeps
+    # being rebuilt: with the scheduler's budget, and with everything done at once
+    results = {}
+    for label, budget in (("budget", AI_BUDGET_US), ("unbounded", None)):
+        world = make_world(size, count)
+        world.ai_budget_us = budget
+        cells = world.open_cells.cells
+        worst = 0.0
+        for i in range(steps):
+            world.player_x, world.player_y = cells[i * 7 % len(cells)]
+            start = time.perf_counter()
+            world.update_enemies(1 / 60)
+            worst = max(worst, time.perf_counter() - start)
+        results[f"ai_worst_step[grid={size},enemies={count},{label}]"] = worst
+    return results
+
+
+def bench_bullets(size, count, min_time):
+    world = make_world(size, count)
+    rng = random.Random(count)
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    bullets = []
+    for _ in range(count):
+        x, y = world.get_random_spawn()
+        bullets.append((x + 0.4, y + 0.4) + rng.choice(directions))
+    enemies = world.enemies[:]
+
+    def setup():
+        fill_bullets(world, bullets)
+        world.enemies = enemies[:]
+        world.index_enemies()
+    key = f"move_bullets[grid={size},bullets={count},enemies={count}]"
+    return {key: time_op(lambda: world.move_bullets(1 / 60), min_time, setup)}
+
+
+class NullClock:
+    # The frame cap is not part of the drawing cost
+    def tick(self, framerate=0):
+        return 0
+
+    def get_time(self):
+        return 0
+
+
+def bench_draw_frame(counts, min_time):
+    import main
+    game = main.Game()
+    game.clock = NullClock()
+    results = {}
+    for count in counts:
+        game.start_game("EXTREME")
+        world = game.world
+        world.enemies = [Enemy(*world.get_random_spawn()) for _ in range(count)]
+        world.index_enemies()
+        world.bullets = BulletPool(max(1000, count))
+        fill_bullets(world, [(x + 0.4, y + 0.4, 1, 0) for x, y in (world.get_random_spawn() for _ in range(count))])
+        def frame():
+            game.present(game.draw_game())
+
+        def full_frame():
+            game.full_redraw = True
+            frame()
+        frame()
+        results[f"draw_frame[enemies={count},bullets={count}]"] = time_op(frame, min_time)
+        results[f"draw_frame_full[enemies={count},bullets={count}]"] = time_op(full_frame, min_time)
+    return results
+
+
+def bench_draw_scrolling(sizes, count, min_time):
+    # The camera follows a player walking right, so every frame scrolls
+    import main
+    game = main.Game()
+    game.clock = NullClock()
+    results = {}
+    for size in sizes:
+        game.maze_size = (size, size)
+        game.start_game("HARD")
+        world = game.world
+        world.enemies = [Enemy(*world.get_random_spawn()) for _ in range(count)]
+        world.index_enemies()
+        world.player_x = world.player_y = size / 2
+
+        def frame():
+            world.prev_player_x = world.player_x
+            world.player_x = world.player_x + 0.05 if world.player_x < size - 2 else 1.0
+            game.present(game.draw_game())
+        results[f"draw_frame_scrolling[grid={size},enemies={count}]"] = time_op(frame, min_time)
+    game.maze_size = None
+    return results
+
+
+def bench_intro_frame(min_time):
+    import main
+    from intro import Intro, STEP
+    intro = Intro(main.Game().title_font, main.TEXT_COLOR, main.WHITE, main.BORDER_COLOR, seed=1)
+    for step in intro.load_steps():
+        step()
+
+    def frame():
+        intro.update(STEP)
+        intro.draw(main.screen)
+    return {"intro_frame": time_op(frame, min_time)}
+
+
+def bench_scrolling_frames(min_time):
+    import main
+    game = main.Game()
+    game.start_credits()
+    game.update_credits()
+
+    def credits_frame():
+        game.credits_scroll = (game.credits_scroll + 4) % (main.HEIGHT + game.credits_content.height)
+        game.draw_credits()
+
+    def help_frame():
+        game.help_scroll_y = (game.help_scroll_y + 4) % game.help_content_height
+        game.draw_help_screen()
+    game.draw_help_screen()
+    return {"credits_frame": time_op(credits_frame, min_time), "help_frame": time_op(help_frame, min_time)}
+
+
+def bench_replays(folder, min_time):
+    # Recorded sessions replayed headless: real play as a fixed workload
+    from replay import Replay
+    results = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.replay"))):
+        replay = Replay(path)
+        if not replay.verify(replay.run()):
+            print(f"{path} no longer replays the same run; skipped", file=sys.stderr)
+            continue
+        name = os.path.splitext(os.path.basename(path))[0]
+        results[f"replay[{name}]"] = time_op(replay.run, min_time)
+    return results
+
+
+def bench_startup(runs):
+    # Median over fresh processes, since imports and first loads only happen once
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "main.py", "--time-to-first-frame"],
+                                capture_output=True, text=True, check=True).stdout
+        for line in output.splitlines():
+            if line.startswith("time_to_first_frame"):
+                times.append(float(line.split()[1]) / 1000)
+    return {"time_to_first_frame": statistics.median(times)}
+
+
+def run_suite(quick=False, only=None, replays="replays"):
+    min_time = 0.05 if quick else 0.3
+    sizes = QUICK_GRID_SIZES if quick else GRID_SIZES
+    maze_sizes = QUICK_GRID_SIZES if quick else MAZE_SIZES
+    ticks = QUICK_SOAK_TICKS if quick else SOAK_TICKS
+    counts = QUICK_ENTITY_COUNTS if quick else ENTITY_COUNTS
+    groups = {
+        "maze": lambda: [bench_maze_generation(size, min_time) for size in maze_sizes],
+        "world": lambda: [bench_world(level, ticks) for level in (1, 2, 3)],
+        "flow_field": lambda: [bench_flow_field(size, min_time) for size in sizes],
+        "collision": lambda: [bench_collision(size, min_time) for size in sizes],
+        "enemies": lambda: [bench_enemies(101, count, min_time) for count in counts],
+        "ai": lambda: [bench_ai_spikes(size, 100) for size in sizes],
+        "bullets": lambda: [bench_bullets(101, count, min_time) for count in counts],
+        "draw": lambda: [bench_draw_frame(counts, min_time), bench_draw_scrolling(sizes, 100, min_time)],
+        "intro": lambda: [bench_intro_frame(min_time)],
+        "scrolling": lambda: [bench_scrolling_frames(min_time)],
+        "startup": lambda: [bench_startup(3 if quick else 7)],
+        "replay": lambda: [bench_replays(replays, min_time)],
+    }
+    results = {}
+    for name, group in groups.items():
+        if only and name not in only:
+            continue
+        print(f"== {name} ==", file=sys.stderr)
+        for partial in group():
+            for key, seconds in partial.items():
+                line = f"{key:<55} {seconds * 1e6:>12.1f} us"
+                if key in RATES:
+                    amount, unit = RATES[key]
+                    line += f" {amount / seconds:>14.0f} {unit}"
+                print(line, file=sys.stderr)
+            results.update(partial)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, seconds in sorted(results.items()):
+        before = baseline.get(key)
+        if before is None:
+            continue
+        change = seconds / before - 1
+        if change > threshold:
+            regressions.append((key, before, seconds, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths headless.")
+    parser.add_argument("--quick", action="store_true", help="fewer sizes and shorter runs")
+    parser.add_argument("--only", nargs="+", help="groups to run: maze, world, flow_field, collision, enemies, ai, bullets, draw, intro, scrolling, startup, replay")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results JSON")
+    parser.add_argument("--replays", default="replays", help="folder of recorded runs for the replay group")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown per benchmark as a fraction (default 0.25)")
+    args = parser.parse_args()
+
+    output = os.path.join(LAUNCH_DIR, args.output)
+    results = run_suite(args.quick, args.only, os.path.join(LAUNCH_DIR, args.replays))
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+        "rates": {key: {"value": RATES[key][0] / results[key], "unit": RATES[key][1]}
+                  for key in results if key in RATES},
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(os.path.join(LAUNCH_DIR, args.baseline)) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for key, before, after, change in regressions:
+            print(f"REGRESSION {key}: {before * 1e6:.1f} us -> {after * 1e6:.1f} us (+{change:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import subprocess
+
+# Headless: packing needs a display format to convert to, not a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Sources are read relative to this directory
+LAUNCH_DIR = os.getcwd()
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import pygame
+from assets import ATLAS_MANIFEST
+from main import SOUND_EFFECTS
+
+SPRITES = [f"player{i}.png" for i in range(1, 7)] + ["enemy.png", "key.png"]
+SPRITE_MAX_SIZE = 256  # Sprites are drawn at most 140 px wide, so larger sources are wasted bytes
+ATLAS_IMAGE = "atlas.png"
+ATLAS_WIDTH = 1024
+PADDING = 2
+TOOLS = ["benchmark.py", "build_assets.py", "test_pathfinding.py"]  # Scripts that are not part of the game
+COPIED = ["back.png", "version.txt", "mazes.db"]
+# ffmpeg libvorbis quality (0-10) per kind of sound; effects are short and mono
+EFFECT_QUALITY = 2
+MUSIC_QUALITY = 3
+
+
+def shrink(surface, max_size):
+    w, h = surface.get_size()
+    scale = max_size / max(w, h)
+    if scale >= 1:
+        return surface
+    return pygame.transform.smoothscale(surface, (max(1, round(w * scale)), max(1, round(h * scale))))
+
+
+def pack_sprites(names, width=ATLAS_WIDTH, padding=PADDING):
+    # Shelf packing, tallest first: sprites left to right, wrapping at width
+    images = {name: shrink(pygame.image.load(name).convert_alpha(), SPRITE_MAX_SIZE) for name in names}
+    order = sorted(names, key=lambda name: images[name].get_height(), reverse=True)
+    rects = {}
+    x = y = shelf = used = 0
+    for name in order:
+        w, h = images[name].get_size()
+        if x + w > width:
+            x, y, shelf = 0, y + shelf + padding, 0
+        rects[name] = pygame.Rect(x, y, w, h)
+        used = max(used, x + w)
+        x += w + padding
+        shelf = max(shelf, h)
+    atlas = pygame.Surface((used, y + shelf), pygame.SRCALPHA)
+    for name in order:
+        atlas.blit(images[name], rects[name])
+    return atlas, rects
+
+
+def transcode(source, target, quality, mono):
+    # Returns False when ffmpeg is missing or fails, so the caller copies the source
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return False
+    command = [ffmpeg, "-y", "-loglevel", "error", "-i", source, "-vn",
+               "-c:a", "libvorbis", "-q:a", str(quality)]
+    if mono:
+        command += ["-ac", "1"]
+    result = subprocess.run(command + [target], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Could not transcode {source}: {result.stderr.strip()}", file=sys.stderr)
+        return False
+    return True
+
+
+def pack_sounds(output):
+    # Sounds that came out smaller as OGG are listed in the manifest; the
+    # rest are copied as they are
+    effects = {effect.path for effect in SOUND_EFFECTS.values()}
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg not found, copying sounds without transcoding", file=sys.stderr)
+    sounds = {}
+    for source in sorted(glob.glob("*.mp3")):
+        packed = os.path.splitext(source)[0] + ".ogg"
+        target = os.path.join(output, packed)
+        quality = EFFECT_QUALITY if source in effects else MUSIC_QUALITY
+        if transcode(source, target, quality, mono=source in effects) and \
+                os.path.getsize(target) < os.path.getsize(source):
+            sounds[source] = packed
+            continue
+        if os.path.exists(target):
+            os.remove(target)
+        shutil.copy2(source, output)
+    return sounds
+
+
+def runtime_files():
+    code = [name for name in glob.glob("*.py") if name not in TOOLS]
+    return sorted(code + glob.glob("*.ttf") + [name for name in COPIED if os.path.exists(name)])
+
+
+def build(output):
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+    for name in runtime_files():
+        shutil.copy2(name, output)
+    if os.path.isdir("web"):
+        shutil.copytree("web", os.path.join(output, "web"))
+
+    atlas, rects = pack_sprites(SPRITES)
+    pygame.image.save(atlas, os.path.join(output, ATLAS_IMAGE))
+    manifest = {
+        "image": ATLAS_IMAGE,
+        "sprites": {name: list(rect) for name, rect in sorted(rects.items())},
+        "sounds": pack_sounds(output),
+    }
+    with open(os.path.join(output, ATLAS_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def tree_size(paths):
+    return len(paths), sum(os.path.getsize(path) for path in paths)
+
+
+def bundle_files(output):
+    return [os.path.join(folder, name) for folder, _, names in os.walk(output) for name in names]
+
+
+def source_files():
+    # What the web build shipped before packing: every runtime file and asset
+    sources = runtime_files() + SPRITES + glob.glob("*.mp3")
+    if os.path.isdir("web"):
+        sources += bundle_files("web")
+    return sources
+
+
+def time_loads(load, runs):
+    # Best of several runs, each loading from scratch, in milliseconds
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        load()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(output, manifest, runs):
+    from assets import AssetManager
+
+    def load_sources():
+        assets = AssetManager(manifest=None)
+        for name in SPRITES:
+            assets.image(name)
+
+    def load_bundle():
+        assets = AssetManager(manifest=os.path.join(output, ATLAS_MANIFEST))
+        for name in SPRITES:
+            assets.image(name)
+
+    def load_sounds(resolve):
+        for name in glob.glob("*.mp3"):
+            pygame.mixer.Sound(resolve(name))
+
+    report = {}
+    report["source_files"], report["source_bytes"] = tree_size(source_files())
+    report["bundle_files"], report["bundle_bytes"] = tree_size(bundle_files(output))
+    report["sprite_decode_ms"] = time_loads(load_sources, runs)
+    report["atlas_decode_ms"] = time_loads(load_bundle, runs)
+    if pygame.mixer.get_init():
+        packed = {name: os.path.join(output, ogg) for name, ogg in manifest["sounds"].items()}
+        report["sound_decode_ms"] = time_loads(lambda: load_sounds(lambda name: name), runs)
+        report["bundle_sound_decode_ms"] = time_loads(lambda: load_sounds(lambda name: packed.get(name, name)), runs)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack sprites into an atlas and transcode sounds for the web bundle.")
+    parser.add_argument("--output", default=os.path.join("build", "web"), help="bundle directory, replaced on each run")
+    parser.add_argument("--runs", type=int, default=5, help="cold loads timed for the report (best is kept)")
+    parser.add_argument("--report", help="also write the size and load time report to this JSON file")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    output = os.path.join(LAUNCH_DIR, args.output)
+    manifest = build(output)
+    print(f"Packed {len(manifest['sprites'])} sprites and {len(manifest['sounds'])} sounds into {output}")
+
+    report = measure(output, manifest, args.runs)
+    print(f"{'files':<24} {report['source_files']:>10} -> {report['bundle_files']}")
+    print(f"{'bytes':<24} {report['source_bytes']:>10} -> {report['bundle_bytes']}")
+    print(f"{'sprite decode ms':<24} {report['sprite_decode_ms']:>10.1f} -> {report['atlas_decode_ms']:.1f}")
+    if "sound_decode_ms" in report:
+        print(f"{'sound decode ms':<24} {report['sound_decode_ms']:>10.1f} -> {report['bundle_sound_decode_ms']:.1f}")
+    if args.report:
+        with open(os.path.join(LAUNCH_DIR, args.report), "w") as f:
+            json.dump(report, f, indent=2)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
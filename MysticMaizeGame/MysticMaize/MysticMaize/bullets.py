@@ -0,0 +1,39 @@
+from array import array
+
+
+class BulletPool:
+    # Fixed-capacity bullet storage in parallel arrays. Live bullets are kept
+    # packed at the front; removal swaps the last live bullet into the hole.
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.x = array('d', bytes(8 * capacity))
+        self.y = array('d', bytes(8 * capacity))
+        self.dx = array('b', bytes(capacity))
+        self.dy = array('b', bytes(capacity))
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        x, y, dx, dy = self.x, self.y, self.dx, self.dy
+        for i in range(self.count):
+            yield x[i], y[i], dx[i], dy[i]
+
+    def spawn(self, x, y, dx, dy):
+        if self.count == self.capacity:
+            return False
+        i = self.count
+        self.x[i], self.y[i], self.dx[i], self.dy[i] = x, y, dx, dy
+        self.count += 1
+        return True
+
+    def kill(self, i):
+        last = self.count - 1
+        if i != last:
+            self.x[i], self.y[i] = self.x[last], self.y[last]
+            self.dx[i], self.dy[i] = self.dx[last], self.dy[last]
+        self.count = last
+
+    def clear(self):
+        self.count = 0
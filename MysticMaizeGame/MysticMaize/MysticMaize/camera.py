@@ -0,0 +1,56 @@
+import math
+
+import pygame
+
+
+class Camera:
+    # The one transform from world units (maze cells) to screen pixels.
+    # The maze is drawn at cell_size inside view, a screen rect; when it is
+    # larger than the view the camera scrolls to keep a point centred,
+    # stopping at the maze edges. Offsets are whole pixels so cells never
+    # shimmer while scrolling.
+    def __init__(self, cell_size, view, cols, rows):
+        self.cell_size = cell_size
+        self.view = pygame.Rect(view)
+        self.cols = cols
+        self.rows = rows
+        self.offset_x = 0
+        self.offset_y = 0
+
+    def follow(self, x, y):
+        # Centres world point (x, y); returns True if the view moved
+        offset_x = self.clamp(x * self.cell_size - self.view.width / 2, self.cols, self.view.width)
+        offset_y = self.clamp(y * self.cell_size - self.view.height / 2, self.rows, self.view.height)
+        moved = (offset_x, offset_y) != (self.offset_x, self.offset_y)
+        self.offset_x, self.offset_y = offset_x, offset_y
+        return moved
+
+    def clamp(self, offset, cells, view_size):
+        largest = cells * self.cell_size - view_size
+        if largest <= 0:
+            return 0
+        return int(min(max(offset, 0), largest))
+
+    def to_screen(self, x, y):
+        return (self.view.x + x * self.cell_size - self.offset_x,
+                self.view.y + y * self.cell_size - self.offset_y)
+
+    def to_world(self, screen_x, screen_y):
+        return ((screen_x - self.view.x + self.offset_x) / self.cell_size,
+                (screen_y - self.view.y + self.offset_y) / self.cell_size)
+
+    def world_view(self, margin=0):
+        # Visible area in world units as (x, y, width, height), grown by margin cells
+        x, y = self.offset_x / self.cell_size - margin, self.offset_y / self.cell_size - margin
+        return x, y, self.view.width / self.cell_size + 2 * margin, self.view.height / self.cell_size + 2 * margin
+
+    def visible_cells(self, margin=0):
+        # Column and row ranges of the cells inside the view, clipped to the maze
+        x, y, width, height = self.world_view(margin)
+        cols = range(max(0, math.floor(x)), min(self.cols, math.ceil(x + width)))
+        rows = range(max(0, math.floor(y)), min(self.rows, math.ceil(y + height)))
+        return cols, rows
+
+    def is_visible(self, x, y, size, margin=0):
+        view_x, view_y, width, height = self.world_view(margin)
+        return view_x < x + size and x < view_x + width and view_y < y + size and y < view_y + height
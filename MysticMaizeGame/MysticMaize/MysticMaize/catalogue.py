@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+
+from world import MazeWorld, LEVEL_MAZES
+from pathfinding import bfs_distances, UNREACHABLE, NEIGHBOURS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mazes (
+    level INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    solution_length INTEGER NOT NULL,
+    route_length INTEGER NOT NULL,
+    dead_ends INTEGER NOT NULL,
+    branching REAL NOT NULL,
+    key_min_distance INTEGER,
+    key_mean_distance REAL,
+    enemy_min_distance INTEGER,
+    score REAL NOT NULL,
+    vetted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (level, rows, cols, seed)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS mazes_by_score ON mazes (level, rows, cols, vetted, score);
+CREATE INDEX IF NOT EXISTS mazes_by_length ON mazes (level, rows, cols, solution_length);
+"""
+METRICS = ["solution_length", "route_length", "dead_ends", "branching", "key_min_distance",
+           "key_mean_distance", "enemy_min_distance", "score"]
+DEAD_END_WEIGHT = 0.5  # Steps of score each dead end adds, as a place to get lost
+ENEMY_MIN_DISTANCE = 6  # Mazes with an enemy closer than this to the start are never vetted
+# Some seeds cut the goal or a key off from the start; those are never vetted either
+PLAYABLE = "route_length >= 0 AND (enemy_min_distance IS NULL OR enemy_min_distance >= ?)"
+VETTED_BAND = (0.25, 0.75)  # Score percentiles kept per level and size
+BATCH = 500  # Rows written per transaction while generating
+
+
+def cell_distance(distances, cols, rows, x, y):
+    # Enemies may start inside a wall; they walk out to the nearest open cell
+    d = distances[y * cols + x]
+    if d != UNREACHABLE:
+        return d
+    around = [distances[ny * cols + nx] for nx, ny in ((x + dx, y + dy) for dx, dy in NEIGHBOURS)
+              if 0 <= nx < cols and 0 <= ny < rows and distances[ny * cols + nx] != UNREACHABLE]
+    return min(around) + 1 if around else UNREACHABLE
+
+
+def route_length(world, from_start):
+    # Steps from the start to the goal, through every key nearest first;
+    # UNREACHABLE when a key or the goal cannot be reached at all
+    distances, total = from_start, 0
+    stops = list(world.keys)
+    while stops:
+        nearest = min(stops, key=lambda k: distances[k[1] * world.cols + k[0]])
+        steps = distances[nearest[1] * world.cols + nearest[0]]
+        if steps == UNREACHABLE or any(distances[y * world.cols + x] == UNREACHABLE for x, y in stops):
+            return UNREACHABLE
+        total += steps
+        stops.remove(nearest)
+        distances = bfs_distances(world.grid, *nearest)
+    steps = distances[world.end_pos[1] * world.cols + world.end_pos[0]]
+    return UNREACHABLE if steps == UNREACHABLE else total + steps
+
+
+def analyse(job):
+    # One maze exactly as the game builds it for this level and seed
+    level, seed, rows, cols = job
+    world = MazeWorld(level, seed, (rows, cols))
+    grid = world.grid
+    distances = world.open_cells.start_distances
+    degrees = [sum(1 for dx, dy in NEIGHBOURS
+                   if 0 <= x + dx < cols and 0 <= y + dy < rows and grid[y + dy][x + dx] == 0)
+               for x, y in world.open_cells.cells]
+    key_distances = [distances[y * cols + x] for x, y in world.keys]
+    enemy_distances = [cell_distance(distances, cols, rows, enemy.x, enemy.y) for enemy in world.enemies]
+    dead_ends = degrees.count(1)
+    route = route_length(world, distances)
+    return {
+        "level": level, "rows": rows, "cols": cols, "seed": seed,
+        "solution_length": distances[world.end_pos[1] * cols + world.end_pos[0]],
+        "route_length": route,
+        "dead_ends": dead_ends,
+        "branching": round(sum(degrees) / len(degrees), 3),
+        "key_min_distance": min(key_distances) if key_distances else None,
+        "key_mean_distance": round(sum(key_distances) / len(key_distances), 2) if key_distances else None,
+        "enemy_min_distance": min(enemy_distances) if enemy_distances else None,
+        "score": route + DEAD_END_WEIGHT * dead_ends if route != UNREACHABLE else UNREACHABLE,
+    }
+
+
+class MazeCatalogue:
+    # Seeds with their measured properties, in SQLite, indexed so the game
+    # can pick a vetted seed for a level with one indexed query
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def add(self, rows):
+        columns = ["level", "rows", "cols", "seed"] + METRICS
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO mazes ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [[row[column] for column in columns] for row in rows])
+
+    def vet(self):
+        # Keeps the middle band of scores among the playable mazes of each
+        # level and size
+        with self.conn:
+            self.conn.execute("UPDATE mazes SET vetted = 0")
+            groups = self.conn.execute(f"SELECT level, rows, cols, COUNT(*) FROM mazes WHERE {PLAYABLE} "
+                                       "GROUP BY level, rows, cols", (ENEMY_MIN_DISTANCE,)).fetchall()
+            for level, rows, cols, count in groups:
+                low, high = (self.conn.execute(
+                    f"SELECT score FROM mazes WHERE level = ? AND rows = ? AND cols = ? AND {PLAYABLE} "
+                    "ORDER BY score LIMIT 1 OFFSET ?",
+                    (level, rows, cols, ENEMY_MIN_DISTANCE, min(count - 1, int(count * fraction)))).fetchone()[0]
+                    for fraction in VETTED_BAND)
+                self.conn.execute(
+                    f"UPDATE mazes SET vetted = 1 WHERE level = ? AND rows = ? AND cols = ? AND {PLAYABLE} "
+                    "AND score BETWEEN ? AND ?", (level, rows, cols, ENEMY_MIN_DISTANCE, low, high))
+
+    def pick(self, level, rows, cols, rng=random):
+        count = self.conn.execute("SELECT COUNT(*) FROM mazes WHERE level = ? AND rows = ? AND cols = ? AND vetted = 1",
+                                  (level, rows, cols)).fetchone()[0]
+        if not count:
+            return None
+        return self.conn.execute(
+            "SELECT seed FROM mazes WHERE level = ? AND rows = ? AND cols = ? AND vetted = 1 ORDER BY score LIMIT 1 OFFSET ?",
+            (level, rows, cols, rng.randrange(count))).fetchone()[0]
+
+    def summary(self):
+        return self.conn.execute(
+            f"SELECT level, rows, cols, COUNT(*), SUM({PLAYABLE}), SUM(vetted), MIN(score), AVG(score), MAX(score) "
+            "FROM mazes WHERE score >= 0 GROUP BY level, rows, cols", (ENEMY_MIN_DISTANCE,)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and score seeded mazes in parallel into a catalogue.")
+    parser.add_argument("--levels", type=int, nargs="+", default=sorted(LEVEL_MAZES), help="levels to generate")
+    parser.add_argument("--seeds", type=int, default=1000, help="mazes per level")
+    parser.add_argument("--first-seed", type=int, default=0, help="seeds run from here upwards")
+    parser.add_argument("--size", type=int, help="square maze size instead of each level's own")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "mazes.db"),
+                        help="catalogue to add to (default: next to the game, where it looks for it)")
+    args = parser.parse_args()
+    # Only the tool needs worker processes, so the game never imports this
+    import multiprocessing
+
+    jobs = [(level, seed) + ((args.size, args.size) if args.size else LEVEL_MAZES[level][1:])
+            for level in args.levels for seed in range(args.first_seed, args.first_seed + args.seeds)]
+    catalogue = MazeCatalogue(args.output)
+    start = time.perf_counter()
+    batch = []
+    with multiprocessing.Pool(args.workers) as pool:
+        # Results are written as they arrive, in batches, so memory stays flat
+        for done, row in enumerate(pool.imap_unordered(analyse, jobs, chunksize=32), 1):
+            batch.append(row)
+            if len(batch) == BATCH:
+                catalogue.add(batch)
+                batch = []
+                print(f"{done}/{len(jobs)} mazes", file=sys.stderr)
+    catalogue.add(batch)
+    catalogue.vet()
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(jobs)} mazes in {elapsed:.1f} s ({len(jobs) / elapsed:.0f}/s) with {args.workers} workers")
+    for level, rows, cols, count, playable, vetted, low, mean, high in catalogue.summary():
+        print(f"level {level} {rows}x{cols}: {count} solvable, {playable} playable, {vetted} vetted, "
+              f"score min/mean/max {low:.0f}/{mean:.0f}/{high:.0f}")
+    catalogue.close()
+
+
+if __name__ == "__main__":
+    main()
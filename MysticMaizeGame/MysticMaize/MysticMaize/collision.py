@@ -0,0 +1,125 @@
+import math
+
+
+class WallMap:
+    # Wall bitmap of the maze grid. Box queries only look at the cells the
+    # box overlaps, so their cost does not depend on the maze size.
+    # Anything outside the grid counts as wall.
+    def __init__(self, grid, cell_size, origin_x=0, origin_y=0):
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows else 0
+        self.walls = bytearray(1 if grid[row][col] == 1 else 0
+                               for row in range(self.rows) for col in range(self.cols))
+        self.cell_size = cell_size
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+
+    def is_wall(self, col, row):
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.walls[row * self.cols + col] == 1
+        return True
+
+    def cell_span(self, start, length, origin):
+        # Inclusive range of cell indices covered by [start, start + length),
+        # matching pygame.Rect.colliderect, where touching edges do not overlap.
+        first = math.floor((start - origin) / self.cell_size)
+        last = math.ceil((start + length - origin) / self.cell_size) - 1
+        return first, max(first, last)
+
+    def box_hits_wall(self, x, y, width, height):
+        first_col, last_col = self.cell_span(x, width, self.origin_x)
+        first_row, last_row = self.cell_span(y, height, self.origin_y)
+        if first_col < 0 or first_row < 0 or last_col >= self.cols or last_row >= self.rows:
+            return True
+        walls, cols = self.walls, self.cols
+        for row in range(first_row, last_row + 1):
+            base = row * cols
+            for col in range(first_col, last_col + 1):
+                if walls[base + col]:
+                    return True
+        return False
+
+    def column_blocked(self, col, first_row, last_row):
+        for row in range(first_row, last_row + 1):
+            if self.is_wall(col, row):
+                return True
+        return False
+
+    def row_blocked(self, row, first_col, last_col):
+        for col in range(first_col, last_col + 1):
+            if self.is_wall(col, row):
+                return True
+        return False
+
+    def sweep_x(self, x, y, width, height, dx):
+        # How far the box can travel along x (up to dx) before touching a wall.
+        if dx == 0:
+            return 0
+        first_row, last_row = self.cell_span(y, height, self.origin_y)
+        first_col, last_col = self.cell_span(x, width, self.origin_x)
+        target_first, target_last = self.cell_span(x + dx, width, self.origin_x)
+        if dx > 0:
+            for col in range(last_col + 1, target_last + 1):
+                if self.column_blocked(col, first_row, last_row):
+                    return max(0, min(dx, col * self.cell_size + self.origin_x - (x + width)))
+        else:
+            for col in range(first_col - 1, target_first - 1, -1):
+                if self.column_blocked(col, first_row, last_row):
+                    return min(0, max(dx, (col + 1) * self.cell_size + self.origin_x - x))
+        return dx
+
+    def sweep_y(self, x, y, width, height, dy):
+        if dy == 0:
+            return 0
+        first_col, last_col = self.cell_span(x, width, self.origin_x)
+        first_row, last_row = self.cell_span(y, height, self.origin_y)
+        target_first, target_last = self.cell_span(y + dy, height, self.origin_y)
+        if dy > 0:
+            for row in range(last_row + 1, target_last + 1):
+                if self.row_blocked(row, first_col, last_col):
+                    return max(0, min(dy, row * self.cell_size + self.origin_y - (y + height)))
+        else:
+            for row in range(first_row - 1, target_first - 1, -1):
+                if self.row_blocked(row, first_col, last_col):
+                    return min(0, max(dy, (row + 1) * self.cell_size + self.origin_y - y))
+        return dy
+
+
+class SpatialHash:
+    # Uniform grid keyed by maze cell. Each entity is filed under every cell
+    # its box touches, so a query only visits entities in the cells it covers.
+    # Results can repeat an entity that spans several cells. Boxes are
+    # clipped to the grid, so a cell past one edge never wraps onto the other.
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        self.buckets = {}
+
+    def clear(self):
+        self.buckets.clear()
+
+    def span(self, start, length, cells):
+        return range(max(0, math.floor(start)), min(cells - 1, math.floor(start + length)) + 1)
+
+    def insert(self, entity, x, y, size):
+        cols, buckets = self.cols, self.buckets
+        col_span = self.span(x, size, cols)
+        for row in self.span(y, size, self.rows):
+            for col in col_span:
+                key = row * cols + col
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = [entity]
+                else:
+                    bucket.append(entity)
+
+    def query(self, x, y, width, height):
+        cols, buckets = self.cols, self.buckets
+        found = []
+        col_span = self.span(x, width, cols)
+        for row in self.span(y, height, self.rows):
+            for col in col_span:
+                bucket = buckets.get(row * cols + col)
+                if bucket:
+                    found.extend(bucket)
+        return found
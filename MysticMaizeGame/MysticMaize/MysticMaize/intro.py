@@ -0,0 +1,171 @@
+import random
+
+import pygame
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Each title line: letters, where they fly in from and where they settle
+TITLE_LINES = [
+    ("MYSTIC",
+     [(0, 200), (0, 0), (300, 0), (500, 0), (800, 0), (800, 200)],
+     [(180, 200), (279, 200), (350, 200), (415, 200), (492, 200), (527, 200)]),
+    ("MAIZE",
+     [(0, 300), (0, 600), (317, 600), (800, 600), (800, 300)],
+     [(220, 300), (325, 305), (411, 300), (445, 300), (511, 305)]),
+]
+SIZE = (800, 600)
+DURATION = 13  # Seconds before the intro hands over to the menu
+STEP = 1 / 30  # Letters move a fixed distance per step, as they did at 30 fps
+BORDER_WIDTH = 3
+BORDER_VARIANTS = 4  # Atlas pages, each a different pattern of white flicker in the outline
+FLICKER_CHANCE = 0.1
+NOISE_FRAMES = 6
+NOISE_DOTS = 800
+NOISE_KEY = (255, 0, 255)  # Transparent colour of the noise frames, never a grey
+
+
+class GlyphAtlas:
+    # Outlined title glyphs, drawn once and packed into atlas pages. Each page
+    # holds one outline flicker pattern for every glyph, in both fills, so
+    # drawing a glyph is a single blit. Pages are baked one at a time, which
+    # lets the intro start with one and add the rest while it plays.
+    def __init__(self, font, chars, fill, flicker, border, rng, width=1024):
+        self.chars = chars
+        self.fill = fill
+        self.flicker = flicker
+        self.border = border
+        self.rng = rng
+        self.width = width
+        self.solid = {(char, color): font.render(char, True, color)
+                      for char in chars for color in (fill, flicker, border)}
+        self.offsets = [(ox, oy)
+                        for ox in range(-BORDER_WIDTH, BORDER_WIDTH + 1)
+                        for oy in range(-BORDER_WIDTH, BORDER_WIDTH + 1)
+                        if ox or oy]
+        self.rects = {}
+        self.pages = []
+
+    def bake_page(self):
+        glyphs = []
+        for char in self.chars:
+            w, h = self.solid[char, self.fill].get_size()
+            lit_offsets = [self.rng.random() < FLICKER_CHANCE for _ in self.offsets]
+            for lit in (False, True):
+                glyph = pygame.Surface((w + 2 * BORDER_WIDTH, h + 2 * BORDER_WIDTH), pygame.SRCALPHA)
+                for (ox, oy), white in zip(self.offsets, lit_offsets):
+                    glyph.blit(self.solid[char, self.flicker if white else self.border],
+                               (BORDER_WIDTH + ox, BORDER_WIDTH + oy))
+                glyph.blit(self.solid[char, self.flicker if lit else self.fill], (BORDER_WIDTH, BORDER_WIDTH))
+                glyphs.append(((char, lit), glyph))
+
+        # Shelf packing: glyphs left to right, wrapping at width. Every page
+        # has the same layout, so the rects are shared.
+        x = y = shelf = 0
+        for key, glyph in glyphs:
+            w, h = glyph.get_size()
+            if x + w > self.width:
+                x, y, shelf = 0, y + shelf, 0
+            self.rects[key] = pygame.Rect(x, y, w, h)
+            x += w
+            shelf = max(shelf, h)
+        page = pygame.Surface((self.width, y + shelf), pygame.SRCALPHA)
+        for key, glyph in glyphs:
+            page.blit(glyph, self.rects[key])
+        self.pages.append(page)
+
+    def draw(self, target, page, char, lit, x, y):
+        # (x, y) is where the unoutlined letter would be drawn
+        target.blit(self.pages[page], (x - BORDER_WIDTH, y - BORDER_WIDTH), self.rects[char, lit])
+
+
+def make_noise_frame(rng, dots=NOISE_DOTS, size=SIZE, use_numpy=True):
+    # A full-screen frame of scattered grey dots on a transparent colour key.
+    # numpy.random takes a while to import, so the first frame can skip it.
+    frame = pygame.Surface(size)
+    frame.fill(NOISE_KEY)
+    if use_numpy and numpy is not None:
+        noise = numpy.random.default_rng(rng.getrandbits(32))
+        xs = noise.integers(0, size[0], dots)
+        ys = noise.integers(0, size[1], dots)
+        greys = noise.integers(0, 256, dots)
+        pixels = pygame.surfarray.pixels3d(frame)
+        pixels[xs, ys] = greys[:, None]
+        del pixels  # Unlocks the surface
+    else:
+        for _ in range(dots):
+            c = rng.randint(0, 255)
+            frame.set_at((rng.randint(0, size[0] - 1), rng.randint(0, size[1] - 1)), (c, c, c))
+    frame.set_colorkey(NOISE_KEY, pygame.RLEACCEL)
+    return frame
+
+
+class Intro:
+    # The flickering title animation. Everything it draws is prepared ahead;
+    # a frame is a fill, one noise blit and one atlas blit per letter.
+    # Only one atlas page and noise frame are made up front; load_steps()
+    # returns the work that adds the rest.
+    def __init__(self, font, fill, flicker, border, seed=None):
+        self.rng = random.Random(seed)
+        chars = sorted(set("".join(line for line, _, _ in TITLE_LINES)))
+        self.atlas = GlyphAtlas(font, chars, fill, flicker, border, self.rng)
+        self.atlas.bake_page()
+        self.noise = [make_noise_frame(self.rng, use_numpy=False)]
+        self.reset()
+
+    def load_steps(self):
+        steps = [self.atlas.bake_page] * (BORDER_VARIANTS - 1)
+        steps += [self.add_noise_frame] * (NOISE_FRAMES - 1)
+        return steps
+
+    def add_noise_frame(self):
+        self.noise.append(make_noise_frame(self.rng))
+
+    def reset(self):
+        rng = self.rng
+        self.letters = []
+        for line, starts, targets in TITLE_LINES:
+            for char, start, target in zip(line, starts, targets):
+                speed = (rng.randint(2, 3), rng.randint(1, 3))
+                self.letters.append([char, list(start), target, speed, False])
+        self.elapsed = 0.0
+        self.accumulator = 0.0
+        self.finished = False
+        self.shake()
+
+    def shake(self):
+        # Pick this step's flicker: background level, noise frame and atlas page
+        rng = self.rng
+        brightness = min(225, 225 + rng.randint(-30, 30))
+        # The original dimmed a near-white fill with a black overlay of this alpha
+        level = 250 * (255 - brightness) // 255
+        self.background = (level, level, level)
+        self.noise_frame = rng.choice(self.noise)
+        self.page = rng.randrange(len(self.atlas.pages))
+        for letter in self.letters:
+            letter[4] = rng.random() < FLICKER_CHANCE
+
+    def update(self, dt):
+        self.elapsed += dt
+        self.accumulator += dt
+        while self.accumulator >= STEP:
+            self.accumulator -= STEP
+            for letter in self.letters:
+                position, target, speed = letter[1], letter[2], letter[3]
+                for axis in (0, 1):
+                    if position[axis] < target[axis]:
+                        position[axis] += speed[axis]
+                    elif position[axis] > target[axis]:
+                        position[axis] -= speed[axis]
+                    if abs(position[axis] - target[axis]) < speed[axis]:
+                        position[axis] = target[axis]
+            self.shake()
+        self.finished = self.elapsed >= DURATION
+
+    def draw(self, target):
+        target.fill(self.background)
+        target.blit(self.noise_frame, (0, 0))
+        for char, position, _, _, lit in self.letters:
+            self.atlas.draw(target, self.page, char, lit, *position)
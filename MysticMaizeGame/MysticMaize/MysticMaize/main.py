@@ -1,27 +1,61 @@
+import time
+START_TIME = time.perf_counter()  # Reference point for time to first frame
+
 import pygame
 import sys
+import asyncio
 import random
-import time
-import math
 import os
-import json
-import tkinter as tk
-from tkinter import filedialog
+import argparse
+import gc
 from collections import deque
 from pygame.locals import *
-
-# Initialize pygame
-pygame.init()
-pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+from text_cache import FontRegistry, TextCache
+from world import MazeWorld, Inputs, PLAYING, WON, LOST, TICK, BULLET_SPEED, PLAYER_SIZE, LEVEL_MAZES
+from profiler import FrameProfiler
+from assets import AssetManager
+from intro import Intro
+from scrolling import ScrollingContent, Starfield
+from audio import AudioManager, Effect
+from scores import ScoreStore
+from camera import Camera
+from replay import Recorder
+from catalogue import MazeCatalogue
 
 # Constants
 WIDTH, HEIGHT = 800, 600  # Default screen size
 ROWS, COLS = 21, 21  # Maze grid size
-CELL_SIZE = min(WIDTH // COLS, HEIGHT // ROWS)
-PLAYER_SPEED = 4
 MAZE_OFFSET = 20
-BULLET_SPEED = 6
+MIN_CELL_SIZE = 24  # Mazes that would need smaller cells scroll instead
+CELL_SIZE = max(MIN_CELL_SIZE, min(WIDTH // COLS, (HEIGHT - MAZE_OFFSET) // ROWS))
+CULL_MARGIN = 1  # Cells drawn beyond the view, so sprites slide in rather than pop
+REGION_MARGIN = 8  # Cells of maze drawn around the view, so scrolling rarely redraws it
+MAZE_KEY = (255, 0, 255)  # Transparent colour of the maze region, never drawn in the maze
+DIRTY_RECT_LIMIT = 64  # Beyond this many changed rects one full flip is cheaper
 PAUSED = 9  # New game state for pause
+FPS = 60
+MAX_FRAME_TIME = 0.25  # Most real time simulated in one frame after a stall
+LOAD_BUDGET = 0.004  # Seconds of deferred loading allowed per intro frame
+AI_FRAME_BUDGET_US = 2000  # Enemy pathfinding allowed per frame
+WEB = sys.platform == "emscripten"  # Running in the browser under pygbag
+SCORES_DB = "scores.db"
+LEGACY_SCORES = "high_scores.json"  # Best times from older versions, imported once
+LEADERBOARD_SIZE = 3  # Fastest runs shown per difficulty
+CATALOGUE = "mazes.db"  # Vetted seeds written by catalogue.py; levels are random without it
+IDLE_WAIT_MS = 500  # How long a static screen sleeps waiting for input
+CREDITS_SPEED = 240  # Pixels per second the credits scroll up
+CREDITS_SPACING = 60
+
+# Channels reserved for each group of sound effects
+SOUND_GROUPS = {"combat": 4, "pickups": 2, "stingers": 1}
+# Keyed by the world event (or screen) that plays them
+SOUND_EFFECTS = {
+    "shoot": Effect("bullet2.mp3", 0.4, "combat", voices=2, cooldown=0.08),
+    "enemy_killed": Effect("enemy2.mp3", 0.7, "combat", voices=2),
+    "key_pickup": Effect("key_pickup.mp3", 0.5, "pickups"),
+    "game_over": Effect("game_over.mp3", 0.7, "stingers"),
+    "game_win": Effect("game_win.mp3", 0.7, "stingers"),
+}
 
 # Colors
 WHITE = (255, 255, 255)
@@ -34,170 +68,152 @@ BACKGROUND_COLOR = (0, 0, 0)     # Black
 HOVER_COLOR = (255, 215, 0)      # Gold
 SELECTED_COLOR = (0, 255, 0)     # Green
 
-# Screen setup
-screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption('MYSTIC MAIZE')
-
-# Game states
-MAIN_MENU = 0
-GAME = 1
-GAME_OVER = 2
-GAME_WON = 3
-PLAYER_SELECT = 4
-DIFFICULTY_SELECT = 5
-HELP_SCREEN = 6
-ANIMATION = 7
-HIGH_SCORES = 8
-
-class Enemy:
-    def __init__(self, start_x, start_y, image, grid):
-        self.start_x, self.start_y = start_x, start_y
-        self.x, self.y = start_x, start_y
-        self.pixel_x, self.pixel_y = self.x * CELL_SIZE, self.y * CELL_SIZE + MAZE_OFFSET
-        self.target_x, self.target_y = self.pixel_x, self.pixel_y
-        self.speed = 1.3
-        self.path = []
-        self.is_alive = True
-        self.is_visible = True
-        self.original_image = image
-        self.image = pygame.transform.scale(image, (CELL_SIZE - 6, CELL_SIZE - 6))
-        self.last_time = time.time()
-        self.grid = grid
-
-    def move_towards_player(self, player_x, player_y):
-        current_time = time.time()
-        dt = current_time - self.last_time
-        self.last_time = current_time
-
-        if not self.is_visible:
-            return
-
-        target_x = int(player_x // CELL_SIZE)
-        target_y = int((player_y - MAZE_OFFSET) // CELL_SIZE)
-
-        if (self.x, self.y) != (target_x, target_y):
-            self.path = self.bfs((self.x, self.y), (target_x, target_y))
-
-        if not self.path:
-            return
-
-        if abs(self.pixel_x - self.target_x) < self.speed and abs(self.pixel_y - self.target_y) < self.speed:
-            if self.path:
-                next_x, next_y = self.path.pop(0)
-                self.x, self.y = next_x, next_y
-                self.target_x = self.x * CELL_SIZE
-                self.target_y = self.y * CELL_SIZE + MAZE_OFFSET
+# Screen setup, done by init_display() so importing this module has no side effects
+screen = None
 
-        base_speed = 2
-        self.speed = (CELL_SIZE / 30) * base_speed
 
-        move_x = self.speed * dt * 60
-        move_y = self.speed * dt * 60
-
-        if self.pixel_x < self.target_x:
-            self.pixel_x += min(self.speed, self.target_x - self.pixel_x)
-        elif self.pixel_x > self.target_x:
-            self.pixel_x -= min(self.speed, self.pixel_x - self.target_x)
-
-        if self.pixel_y < self.target_y:
-            self.pixel_y += min(self.speed, self.target_y - self.pixel_y)
-        elif self.pixel_y > self.target_y:
-            self.pixel_y -= min(self.speed, self.pixel_y - self.target_y)
+def init_display():
+    global screen
+    if screen is None:
+        pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=512)
+        pygame.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+        pygame.display.set_caption('MYSTIC MAIZE')
+    return screen
 
-    def bfs(self, start, goal):
-        queue = deque([(start, [])])
-        visited = set()
+# Input events whose latency to the next presented frame is measured
+INPUT_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN)
 
-        while queue:
-            (x, y), path = queue.popleft()
 
-            if (x, y) == goal:
-                return path
+def ignore(*args):
+    return None
 
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
 
-                if 0 <= nx < COLS and 0 <= ny < ROWS and self.grid[ny][nx] == 0 and (nx, ny) not in visited:
-                    queue.append(((nx, ny), path + [(nx, ny)]))
-                    visited.add((nx, ny))
+class State:
+    # One entry in Game.states. run() pumps the event queue once per frame,
+    # passes each event to handle(), then calls update() and render().
+    # render() returns the rects that changed, or None to flip the whole screen.
+    # Idle states only change in response to input, so run() sleeps in
+    # pygame.event.wait between frames instead of redrawing at full rate.
+    def __init__(self, handle=ignore, update=ignore, render=ignore, idle=False):
+        self.handle = handle
+        self.update = update
+        self.render = render
+        self.idle = idle
 
-        return []
 
-    def check_collision(self, player_x, player_y):
-        if not self.is_visible:
-            return False
+class FrameScheduler:
+    # Ends each frame of the async main loop. The desktop sleeps to the frame
+    # cap in clock.tick; the browser has no threads to block, so there the
+    # frame just yields and the page's animation frame sets the pace.
+    def __init__(self, clock, fps=FPS, web=WEB):
+        self.clock = clock
+        self.fps = fps
+        self.web = web
 
-        distance = math.sqrt((self.pixel_x - player_x) ** 2 + (self.pixel_y - player_y) ** 2)
-        COLLISION_THRESHOLD = CELL_SIZE
+    async def next_frame(self):
+        if not self.web:
+            self.clock.tick(self.fps)
+        await asyncio.sleep(0)
 
-        if distance < COLLISION_THRESHOLD:
-            return True
+    def wait_event(self, timeout_ms):
+        # Blocking for input would freeze the browser tab
+        if self.web:
+            return pygame.event.Event(pygame.NOEVENT)
+        return pygame.event.wait(timeout_ms)
 
-        return False
 
-    def draw(self, screen):
-        if self.is_visible:
-            screen.blit(self.image, (self.pixel_x, self.pixel_y))
+# Game states
+MAIN_MENU = 0
+GAME = 1
+GAME_OVER = 2
+GAME_WON = 3
+PLAYER_SELECT = 4
+DIFFICULTY_SELECT = 5
+HELP_SCREEN = 6
+ANIMATION = 7
+HIGH_SCORES = 8
+RESET_CONFIRM = 10
+CREDITS = 11
 
 class Game:
-    def __init__(self):
+    def __init__(self, profile=False, profile_csv=None):
+        # Only what the first intro frame needs is loaded here; the rest is
+        # queued in pending_loads and runs between intro frames
+        init_display()
         self.state = ANIMATION
+        self.first_frame_time = None
+        self.quit_after_first_frame = False
         self.help_scroll_y = 0
         self.help_content_height = 800  # Estimate, will be calculated
+        self.help_content = None
+        self.credits_content = None
+        self.credits_stars = []
+        self.credits_size = None
+        self.credits_scroll = 0.0
         self.scrolling = False
         self.difficulty = None
         self.clock = pygame.time.Clock()
-        self.start_time = 0
+        self.scheduler = FrameScheduler(self.clock)
         self.elapsed_time = 0
+        self.last_step_time = time.perf_counter()
+        self.accumulator = 0.0
+        self.alpha = 1.0  # How far rendering is between the last two simulation steps
         self.music_on = True
-        self.collected_keys = 0
         self.goal_reached = False
         self.running = True
         self.selected_player = 0
-        self.custom_player_image = None
+        self.custom_player_path = None
         self.exit_button = None
         self.music_button = None
         self.paused = False
-        self.high_scores = self.load_high_scores()
-
-        # Load sounds
-        self.shoot_sound = pygame.mixer.Sound("bullet2.mp3")
-        self.enemy_killed_sound = pygame.mixer.Sound("enemy2.mp3")
-        self.game_over_sound = pygame.mixer.Sound("game_over.mp3")  
-        self.game_win_sound = pygame.mixer.Sound("game_win.mp3")   
-        self.key_pickup_sound = pygame.mixer.Sound("key_pickup.mp3")  
-        # Set volumes
-        self.shoot_sound.set_volume(0.4)
-        self.enemy_killed_sound.set_volume(0.7)
-        self.game_over_sound.set_volume(0.7)  
-        self.game_win_sound.set_volume(0.7)    
-        self.key_pickup_sound.set_volume(0.5)  
-    
-
+        self.new_high_score = False
+        # Scores open on their writer thread, off the path to the first frame
+        self.scores = ScoreStore(SCORES_DB, LEGACY_SCORES)
+        if not WEB:
+            self.scores.open_async()
+
+        # Frame profiler: F3 toggles the overlay, profile_csv streams every frame
+        self.profiler = FrameProfiler()
+        self.show_profiler = profile
+        self.profiler_overlay = None
+        self.profiler_overlay_time = 0
+        if profile_csv:
+            self.profiler.open_csv(profile_csv)
+        self.profiler.set_enabled(profile or bool(profile_csv))
+
+        # Sprites come from the packed atlas when running from a built bundle
+        self.assets = AssetManager()
+
+        # Sound effects decode in the background while the intro plays
+        self.audio = AudioManager(SOUND_EFFECTS, SOUND_GROUPS, resolve=self.assets.sound)
+        if not WEB:
+            self.audio.load_async()
 
         # Load fonts
+        self.fonts = FontRegistry()
+        self.text = TextCache()
         try:
-            self.font_large = pygame.font.Font('hulk.ttf', 104)
-            self.font_medium = pygame.font.Font('hulk.ttf', 48)
-            self.font_small = pygame.font.Font('hulk.ttf', 36)
-            self.title_font = pygame.font.Font('hulk.ttf', 104)
+            self.font_large = self.fonts.get('hulk.ttf', 104)
+            self.font_medium = self.fonts.get('hulk.ttf', 48)
+            self.font_small = self.fonts.get('hulk.ttf', 36)
+            self.title_font = self.fonts.get('hulk.ttf', 104)
         except:
-            self.font_large = pygame.font.Font(None, 104)
-            self.font_medium = pygame.font.Font(None, 48)
-            self.font_small = pygame.font.Font(None, 36)
-            self.title_font = pygame.font.Font(None, 104)
-
-        # Load and play intro music
-        pygame.mixer.music.load("bgm4.mp3")
-        pygame.mixer.music.play(-1)  # Loop forever
-
-        # Create default player images if missing
-        for i in range(1, 7):
-            if not os.path.exists(f'player{i}.png'):
-                img = pygame.Surface((150, 150))
-                img.fill((random.randint(50, 200), random.randint(50, 200), random.randint(50, 200)))
-                pygame.draw.circle(img, (255, 255, 255), (75, 75), 50)
-                pygame.image.save(img, f'player{i}.png')
+            self.font_large = self.fonts.get(None, 104)
+            self.font_medium = self.fonts.get(None, 48)
+            self.font_small = self.fonts.get(None, 36)
+            self.title_font = self.fonts.get(None, 104)
+        self.intro = Intro(self.title_font, TEXT_COLOR, WHITE, BORDER_COLOR)
+        self.pending_loads = deque(self.intro.load_steps())
+        self.pending_loads.append(self.create_default_players)
+        self.catalogue = None
+        self.pending_loads.append(self.open_catalogue)
+        if WEB:
+            self.pending_loads.append(self.scores.open)
+            self.pending_loads.extend(self.audio.load_steps())
+
+        # Intro music
+        self.audio.play_music("bgm4.mp3")
 
         # Main menu setup
         self.main_menu_options = ["PLAY", "SELECT PLAYER", "HELP", "HIGH SCORES", "QUIT"]
@@ -206,72 +222,95 @@ class Game:
         self.selected_option = None
 
         # Game variables (will be initialized when starting a game)
-        self.player_x = 0
-        self.player_y = 0
-        self.goal_x = 0
-        self.goal_y = 0
-        self.grid = []
-        self.bullets = []
-        self.enemies = []
-        self.keys = []
+        self.world = None
         self.controls = {}
         self.player_image = None
         self.key_image = None
         self.bg = None
         self.enemy_image = None
+        self.maze_layer = None
+        self.hud_layer = None
+        self.maze_region = None
+        self.region_rect = None
+        self.camera = None
+        self.maze_size = None
+        self.record_dir = None
+        self.recorder = None
+        self.dirty_rects = []
+        self.full_redraw = True
 
         # Initialize buttons
         self.update_buttons()
 
+        self.states = {
+            ANIMATION: State(self.handle_intro_events, self.update_intro, self.draw_intro),
+            MAIN_MENU: State(self.handle_main_menu_events, render=self.draw_main_menu, idle=True),
+            DIFFICULTY_SELECT: State(self.handle_difficulty_menu_events, render=self.draw_difficulty_menu, idle=True),
+            PLAYER_SELECT: State(self.handle_player_selection_events, render=self.draw_player_selection, idle=True),
+            HELP_SCREEN: State(self.handle_help_screen_events, render=self.draw_help_screen, idle=True),
+            HIGH_SCORES: State(self.handle_high_scores_events, render=self.draw_high_scores, idle=True),
+            RESET_CONFIRM: State(self.handle_reset_confirmation_events, render=self.draw_reset_confirmation, idle=True),
+            GAME: State(self.handle_game_events, self.update_game, self.draw_game),
+            GAME_OVER: State(self.handle_end_screen_events, render=self.draw_game_over, idle=True),
+            GAME_WON: State(self.handle_end_screen_events, render=self.draw_game_won, idle=True),
+            CREDITS: State(self.handle_credits_events, self.update_credits, self.draw_credits),
+        }
+
+    def create_default_players(self):
+        # Create default player images if missing
+        for i in range(1, 7):
+            if not self.assets.exists(f'player{i}.png'):
+                img = pygame.Surface((150, 150))
+                img.fill((random.randint(50, 200), random.randint(50, 200), random.randint(50, 200)))
+                pygame.draw.circle(img, (255, 255, 255), (75, 75), 50)
+                pygame.image.save(img, f'player{i}.png')
+
+    def open_catalogue(self):
+        if os.path.exists(CATALOGUE):
+            self.catalogue = MazeCatalogue(CATALOGUE)
+
+    def load_pending(self, budget=None):
+        # Runs queued loading steps for up to budget seconds, or all of them
+        deadline = time.perf_counter() + budget if budget is not None else None
+        while self.pending_loads:
+            self.pending_loads.popleft()()
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
     def draw_pause_screen(self):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 180))
         screen.blit(overlay, (0, 0))
         
-        font = pygame.font.Font(None, 72)
-        text = font.render("PAUSED", True, WHITE)
+        font = self.fonts.get(None, 72)
+        text = self.text.render(font, "PAUSED", True, WHITE)
         text_rect = text.get_rect(center=(WIDTH//2, HEIGHT//2 - 50))
         screen.blit(text, text_rect)
         
-        small_font = pygame.font.Font(None, 36)
-        instruction = small_font.render("Press P to continue", True, WHITE)
+        small_font = self.fonts.get(None, 36)
+        instruction = self.text.render(small_font, "Press P to continue", True, WHITE)
         instr_rect = instruction.get_rect(center=(WIDTH//2, HEIGHT//2 + 50))
         screen.blit(instruction, instr_rect)
-        
-        pygame.display.flip()
-
-    def load_high_scores(self):
-        try:
-            with open('high_scores.json', 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {
-                "MEDIUM": {"time": float('inf'), "date": ""},
-                "HARD": {"time": float('inf'), "date": ""},
-                "EXTREME": {"time": float('inf'), "date": ""}
-            }
-
-    def save_high_scores(self):
-        with open('high_scores.json', 'w') as f:
-            json.dump(self.high_scores, f)
 
     def update_high_score(self, difficulty, time_seconds):
-        current_date = time.strftime("%Y-%m-%d %H:%M:%S")
-        if time_seconds < self.high_scores[difficulty]["time"]:
-            self.high_scores[difficulty] = {
-                "time": time_seconds,
-                "date": current_date
-            }
-            self.save_high_scores()
-            return True
-        return False
+        # Every win is kept; the return value says whether it is the new best
+        best = self.scores.best(difficulty)
+        self.scores.record(difficulty, time_seconds, self.seed)
+        return best is None or time_seconds < best.duration
 
     def toggle_music(self):
         self.music_on = not self.music_on
-        if self.music_on:
-            pygame.mixer.music.unpause()
-        else:
-            pygame.mixer.music.pause()
+        self.audio.set_music_paused(self.paused or not self.music_on)
+
+    def toggle_profiler(self):
+        self.show_profiler = not self.show_profiler
+        self.profiler.set_enabled(self.show_profiler or self.profiler.csv_writer is not None)
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.audio.set_music_paused(self.paused or not self.music_on)
+        # The pause overlay covers the whole screen, so repaint it all after
+        self.full_redraw = True
 
     def handle_main_menu_click(self, selected_option):
         if selected_option == "PLAY":
@@ -279,111 +318,43 @@ class Game:
         elif selected_option == "QUIT":
             self.running = False
 
-    def run_animation(self):
-        letters1 = ['M', 'Y', 'S', 'T', 'I', 'C']
-        letters2 = ['M', 'A', 'I', 'Z', 'E']
-        rendered_letters1 = [self.title_font.render(letter, True, TEXT_COLOR) for letter in letters1]
-        rendered_letters2 = [self.title_font.render(letter, True, TEXT_COLOR) for letter in letters2]
-        rects1 = [letter.get_rect() for letter in rendered_letters1]
-        rects2 = [letter.get_rect() for letter in rendered_letters2]
-        initial_positions1 = [(0, 200), (0, 0), (300, 0), (500, 0), (800, 0), (800, 200)]
-        initial_positions2 = [(0, 300), (0, 600), (317, 600), (800, 600), (800, 300)]
-        for i, rect in enumerate(rects1):
-            rect.x, rect.y = initial_positions1[i]
-        for i, rect in enumerate(rects2):
-            rect.x, rect.y = initial_positions2[i]
-        speeds1 = [(random.randint(2, 3), random.randint(1, 3)) for _ in rects1]
-        speeds2 = [(random.randint(2, 3), random.randint(1, 3)) for _ in rects2]
-        targets1 = [(180, 200), (279, 200), (350, 200), (415, 200), (492, 200), (527, 200)]
-        targets2 = [(220, 300), (325, 305), (411, 300), (445, 300), (511, 305)]
-        start_time = time.time()
-        while time.time() - start_time < 13:
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == MOUSEBUTTONDOWN:
-                    if self.music_button and self.music_button.collidepoint(event.pos):
-                        self.toggle_music()
-            for i, rect in enumerate(rects1):
-                if rect.x < targets1[i][0]:
-                    rect.x += speeds1[i][0]
-                if rect.x > targets1[i][0]:
-                    rect.x -= speeds1[i][0]
-                if rect.y < targets1[i][1]:
-                    rect.y += speeds1[i][1]
-                if rect.y > targets1[i][1]:
-                    rect.y -= speeds1[i][1]
-                if abs(rect.x - targets1[i][0]) < speeds1[i][0]:
-                    rect.x = targets1[i][0]
-                if abs(rect.y - targets1[i][1]) < speeds1[i][1]:
-                    rect.y = targets1[i][1]
-            for i, rect in enumerate(rects2):
-                if rect.x < targets2[i][0]:
-                    rect.x += speeds2[i][0]
-                if rect.x > targets2[i][0]:
-                    rect.x -= speeds2[i][0]
-                if rect.y < targets2[i][1]:
-                    rect.y += speeds2[i][1]
-                if rect.y > targets2[i][1]:
-                    rect.y -= speeds2[i][1]
-                if abs(rect.x - targets2[i][0]) < speeds2[i][0]:
-                    rect.x = targets2[i][0]
-                if abs(rect.y - targets2[i][1]) < speeds2[i][1]:
-                    rect.y = targets2[i][1]
-            screen.fill((250, 250, 250))
-            flicker_effect = random.randint(-30, 30)
-            brightness = max(0, min(225, 225 + flicker_effect))
-            overlay = pygame.Surface((800, 600))
-            overlay.set_alpha(brightness)
-            overlay.fill((0, 0, 0))
-            screen.blit(overlay, (0, 0))
-            for _ in range(800):
-                x, y = random.randint(0, 799), random.randint(0, 599)
-                c = random.randint(0, 255)
-                screen.set_at((x, y), (c, c, c))
-            border_width = 3
-            for offset_x in range(-border_width, border_width + 1):
-                for offset_y in range(-border_width, border_width + 1):
-                    if offset_x == 0 and offset_y == 0:
-                        continue
-                    if random.random() < 0.1:
-                        border_color = WHITE
-                    else:
-                        border_color = BORDER_COLOR
-                    for i, letter in enumerate(letters1):
-                        border_letter = self.title_font.render(letter, True, border_color)
-                        screen.blit(border_letter, (rects1[i].x + offset_x, rects1[i].y + offset_y))
-                    for i, letter in enumerate(letters2):
-                        border_letter = self.title_font.render(letter, True, border_color)
-                        screen.blit(border_letter, (rects2[i].x + offset_x, rects2[i].y + offset_y))
-            for i, (rect, letter) in enumerate(zip(rects1, letters1)):
-                color = WHITE if random.random() < 0.1 else TEXT_COLOR
-                text_surface = self.title_font.render(letter, True, color)
-                screen.blit(text_surface, rect)
-            for i, (rect, letter) in enumerate(zip(rects2, letters2)):
-                color = WHITE if random.random() < 0.1 else TEXT_COLOR
-                text_surface = self.title_font.render(letter, True, color)
-                screen.blit(text_surface, rect)
-            self.update_buttons()
-            self.draw_music_button()
-            pygame.display.flip()
-            self.clock.tick(30)
+    def frame_time(self):
+        # Real time since the last call, capped so a stall is not replayed in full
+        now = time.perf_counter()
+        frame_time = min(now - self.last_step_time, MAX_FRAME_TIME)
+        self.last_step_time = now
+        return frame_time
+
+    def handle_intro_events(self, event):
+        # Any key or click skips the intro, except clicks on the music button
+        if event.type == pygame.MOUSEBUTTONDOWN and self.music_button.collidepoint(event.pos):
+            self.toggle_music()
+        elif event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            self.state = MAIN_MENU
+
+    def update_intro(self):
+        self.intro.update(self.frame_time())
+        if self.intro.finished:
+            self.state = MAIN_MENU
+
+    def draw_intro(self):
+        self.intro.draw(screen)
+        self.update_buttons()
+        self.draw_music_button()
 
     def draw_main_menu(self):
         screen.fill(BACKGROUND_COLOR)
-        title = self.font_medium.render("MYSTIC MAIZE", True, TEXT_COLOR)
+        title = self.text.render(self.font_medium, "MYSTIC MAIZE", True, TEXT_COLOR)
         screen.blit(title, (400 - title.get_width()//2, 50))
         for i, option in enumerate(self.main_menu_options):
             rect = pygame.Rect(200, 120 + i*80, 400, 50)
             color = HOVER_COLOR if rect.collidepoint(pygame.mouse.get_pos()) else (60, 60, 60)
             pygame.draw.rect(screen, BORDER_COLOR, rect, 5, border_radius=20)
             pygame.draw.rect(screen, color, rect.inflate(-10, -10), border_radius=20)
-            text = self.font_medium.render(option, True, TEXT_COLOR)
+            text = self.text.render(self.font_medium, option, True, TEXT_COLOR)
             screen.blit(text, (400 - text.get_width()//2, 145 + i*80 - text.get_height()//2))
         self.update_buttons()
         self.draw_music_button()
-        pygame.display.flip()
 
     def handle_main_menu_events(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -407,24 +378,23 @@ class Game:
 
     def draw_difficulty_menu(self):
         screen.fill(BACKGROUND_COLOR)
-        title = self.font_medium.render("SELECT DIFFICULTY", True, TEXT_COLOR)
+        title = self.text.render(self.font_medium, "SELECT DIFFICULTY", True, TEXT_COLOR)
         screen.blit(title, (400 - title.get_width()//2, 100))
         for i, diff in enumerate(self.difficulty_options):
             rect = pygame.Rect(225, 200 + i*100, 350, 60)
             color = HOVER_COLOR if rect.collidepoint(pygame.mouse.get_pos()) else (60, 60, 60)
             pygame.draw.rect(screen, BORDER_COLOR, rect, 5, border_radius=20)
             pygame.draw.rect(screen, color, rect.inflate(-10, -10), border_radius=20)
-            text = self.font_medium.render(diff, True, TEXT_COLOR)
+            text = self.text.render(self.font_medium, diff, True, TEXT_COLOR)
             screen.blit(text, (400 - text.get_width()//2, 230 + i*100 - text.get_height()//2))
         back_btn = pygame.Rect(50, 500, 200, 60)
         color = HOVER_COLOR if back_btn.collidepoint(pygame.mouse.get_pos()) else (60, 60, 60)
         pygame.draw.rect(screen, BORDER_COLOR, back_btn, 5, border_radius=20)
         pygame.draw.rect(screen, color, back_btn.inflate(-10, -10), border_radius=20)
-        text = self.font_medium.render("BACK", True, TEXT_COLOR)
+        text = self.text.render(self.font_medium, "BACK", True, TEXT_COLOR)
         screen.blit(text, (150 - text.get_width()//2, 530 - text.get_height()//2))
         self.update_buttons()
         self.draw_music_button()
-        pygame.display.flip()
 
     def handle_difficulty_menu_events(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -443,7 +413,7 @@ class Game:
 
     def draw_player_selection(self):
         screen.fill(BACKGROUND_COLOR)
-        title = self.font_medium.render("SELECT PLAYER", True, TEXT_COLOR)
+        title = self.text.render(self.font_medium, "SELECT PLAYER", True, TEXT_COLOR)
         screen.blit(title, (400 - title.get_width()//2, 50))
         for i in range(6):
             x = 150 + (i % 3) * 200
@@ -452,18 +422,17 @@ class Game:
             if i == self.selected_player:
                 pygame.draw.rect(screen, SELECTED_COLOR, rect, 5)
             try:
-                img = pygame.image.load(f'player{i+1}.png')
-                img = pygame.transform.scale(img, (140, 140))
+                img = self.assets.scaled(f'player{i+1}.png', (140, 140))
                 screen.blit(img, (x+5, y+5))
             except:
                 pygame.draw.rect(screen, (255, 0, 0), rect)
-                txt = self.font_small.render(f"Player {i+1}", True, TEXT_COLOR)
+                txt = self.text.render(self.font_small, f"Player {i+1}", True, TEXT_COLOR)
                 screen.blit(txt, (x + 75 - txt.get_width()//2, y + 75 - txt.get_height()//2))
-        if self.selected_player == 6 and self.custom_player_image:
+        if self.selected_player == 6 and self.custom_player_path:
             x, y = 150 + (6 % 3) * 200, 150 + (6 // 3) * 200
             rect = pygame.Rect(x, y, 150, 150)
             pygame.draw.rect(screen, SELECTED_COLOR, rect, 5)
-            img = pygame.transform.scale(self.custom_player_image, (140, 140))
+            img = self.assets.scaled(self.custom_player_path, (140, 140))
             screen.blit(img, (x+5, y+5))
         back_btn = pygame.Rect(50, 500, 350, 80)
         gallery_btn = pygame.Rect(400, 500, 350, 80)
@@ -475,13 +444,12 @@ class Game:
             pygame.draw.rect(screen, HOVER_COLOR, back_btn.inflate(-10, -10), border_radius=15)
         if gallery_btn.collidepoint(pygame.mouse.get_pos()):
             pygame.draw.rect(screen, HOVER_COLOR, gallery_btn.inflate(-10, -10), border_radius=15)
-        back_txt = self.font_medium.render("BACK", True, TEXT_COLOR)
-        gallery_txt = self.font_medium.render("GALLERY", True, TEXT_COLOR)
+        back_txt = self.text.render(self.font_medium, "BACK", True, TEXT_COLOR)
+        gallery_txt = self.text.render(self.font_medium, "GALLERY", True, TEXT_COLOR)
         screen.blit(back_txt, (back_btn.x + 175 - back_txt.get_width()//2, back_btn.y + 40 - back_txt.get_height()//2))
         screen.blit(gallery_txt, (gallery_btn.x + 175 - gallery_txt.get_width()//2, gallery_btn.y + 40 - gallery_txt.get_height()//2))
         self.update_buttons()
         self.draw_music_button()
-        pygame.display.flip()
 
     def handle_player_selection_events(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -495,12 +463,15 @@ class Game:
                 rect = pygame.Rect(x, y, 150, 150)
                 if rect.collidepoint(mouse_pos):
                     self.selected_player = i
-                    self.custom_player_image = None
+                    self.custom_player_path = None
             back_btn = pygame.Rect(50, 500, 350, 80)
             gallery_btn = pygame.Rect(400, 500, 350, 80)
             if back_btn.collidepoint(mouse_pos):
                 self.state = MAIN_MENU
             if gallery_btn.collidepoint(mouse_pos):
+                # Only the file dialog needs tkinter, so it is imported here
+                import tkinter as tk
+                from tkinter import filedialog
                 root = tk.Tk()
                 root.withdraw()
                 file_path = filedialog.askopenfilename(
@@ -509,18 +480,19 @@ class Game:
                 )
                 if file_path:
                     try:
-                        self.custom_player_image = pygame.image.load(file_path)
+                        # Decode now so a bad file is reported here, not mid-game
+                        self.assets.forget(file_path)
+                        self.assets.image(file_path)
+                        self.custom_player_path = file_path
                         self.selected_player = 6
                     except:
                         print("Error loading image")
 
-    def draw_help_screen(self):
-        screen.fill(BACKGROUND_COLOR)
-        
-        # Font setup
-        title_font = getattr(self, 'font_medium', pygame.font.Font(None, 48))
-        section_font = getattr(self, 'font_small', pygame.font.Font(None, 36))
-        body_font = getattr(self, 'font_smaller', pygame.font.Font(None, 30))
+    def build_help_content(self):
+        # Lines are laid out once per window width into one tall surface
+        title_font = self.font_medium
+        section_font = self.font_small
+        body_font = self.fonts.get(None, 30)
         
         # Content organization
         sections = [
@@ -557,36 +529,33 @@ class Game:
             ("• Watch key counter in Extreme", body_font, WHITE, False),
         ]
         
-        # Calculate total content height
-        content_height = 20  # Start with top margin
-        for text, font, _, _ in sections:
+        placed = []
+        y_pos = 20  # Top margin
+        for text, font, color, centered in sections:
             if font and text:
-                content_height += font.size(text)[1] + 8  # Using font.size() for height
-        
+                text_surface = font.render(text, True, color)
+                x_pos = (WIDTH // 2 - text_surface.get_width() // 2) if centered else 50
+                placed.append((text_surface, (x_pos, y_pos)))
+                y_pos += text_surface.get_height() + 8
+
+        self.help_content = ScrollingContent(WIDTH, y_pos, BACKGROUND_COLOR)
+        for text_surface, pos in placed:
+            self.help_content.blit(text_surface, pos)
         # Add space for back button
         back_button_height = 50
-        total_content_height = content_height + back_button_height + 20
-        self.help_content_height = total_content_height
-        
+        self.help_content_height = y_pos + back_button_height + 20
+
+    def draw_help_screen(self):
+        screen.fill(BACKGROUND_COLOR)
+        if self.help_content is None or self.help_content.width != WIDTH:
+            self.build_help_content()
+        total_content_height = self.help_content_height
+        section_font = self.font_small
+
         # Apply scroll limits
         self.help_scroll_y = max(0, min(total_content_height - HEIGHT, self.help_scroll_y))
-        
-        # Draw all content with scroll offset
-        y_pos = 20 - self.help_scroll_y
-        visible_area = pygame.Rect(0, 0, WIDTH, HEIGHT)
-        
-        for text, font, color, centered in sections:
-            if font and text:
-                text_surface = font.render(text, True, color)
-                text_width = text_surface.get_width()
-                x_pos = (WIDTH // 2 - text_width // 2) if centered else 50
-                
-                text_rect = pygame.Rect(x_pos, y_pos, text_width, font.size(text)[1])
-                if visible_area.colliderect(text_rect):
-                    screen.blit(text_surface, (x_pos, y_pos))
-                
-                y_pos += font.size(text)[1] + 8
-        
+        self.help_content.draw(screen, self.help_scroll_y, (0, 0), HEIGHT)
+
         # Draw back button (always at bottom)
         back_button_y = HEIGHT - 60  # Fixed position at bottom
         back_button_rect = pygame.Rect(WIDTH//2 - 100, back_button_y, 200, 40)
@@ -599,7 +568,7 @@ class Game:
         pygame.draw.rect(screen, BORDER_COLOR, back_button_rect, 3, border_radius=10)
         pygame.draw.rect(screen, button_color, back_button_rect.inflate(-6, -6), border_radius=8)
         
-        back_text = section_font.render("BACK", True, WHITE)
+        back_text = self.text.render(section_font, "BACK", True, WHITE)
         screen.blit(back_text, (back_button_rect.centerx - back_text.get_width()//2, 
                             back_button_rect.centery - back_text.get_height()//2))
         
@@ -620,7 +589,6 @@ class Game:
         
         self.update_buttons()
         self.draw_music_button()
-        pygame.display.flip()
     
     def handle_help_screen_events(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -681,23 +649,24 @@ class Game:
         
     def draw_high_scores(self):
         screen.fill(BACKGROUND_COLOR)
-        title = self.font_medium.render("HIGH SCORES", True, TEXT_COLOR)
+        title = self.text.render(self.font_medium, "HIGH SCORES", True, TEXT_COLOR)
         screen.blit(title, (400 - title.get_width()//2, 50))
         
         y_offset = 150
+        row_font = self.fonts.get(None, 30)
         for difficulty in self.difficulty_options:
-            score = self.high_scores[difficulty]
-            diff_text = self.font_small.render(f"{difficulty}:", True, TEXT_COLOR)
-            screen.blit(diff_text, (250, y_offset))
+            runs = self.scores.top(difficulty, LEADERBOARD_SIZE)
+            diff_text = self.text.render(self.font_small, f"{difficulty}:", True, TEXT_COLOR)
+            screen.blit(diff_text, (200, y_offset))
             
-            if score["time"] != float('inf'):
-                time_text = self.font_small.render(f"Time: {score['time']:.2f} sec", True, WHITE)
-                date_text = self.font_small.render(f"Date: {score['date']}", True, WHITE)
-                screen.blit(time_text, (450, y_offset))
-                screen.blit(date_text, (450, y_offset + 40))
+            if runs:
+                for rank, run in enumerate(runs):
+                    row = f"{rank + 1}. {run.duration:.2f} sec   {run.played_at}"
+                    row_text = self.text.render(row_font, row, True, WHITE)
+                    screen.blit(row_text, (400, y_offset + rank * 30))
             else:
-                no_score = self.font_small.render("No record yet", True, WHITE)
-                screen.blit(no_score, (450, y_offset))
+                no_score = self.text.render(self.font_small, "No record yet", True, WHITE)
+                screen.blit(no_score, (400, y_offset))
             
             y_offset += 100  # Increase spacing between difficulty levels
 
@@ -706,7 +675,7 @@ class Game:
         reset_color = HOVER_COLOR if reset_btn.collidepoint(pygame.mouse.get_pos()) else (200, 0, 0)  # Red color
         pygame.draw.rect(screen, BORDER_COLOR, reset_btn, 5, border_radius=20)
         pygame.draw.rect(screen, reset_color, reset_btn.inflate(-10, -10), border_radius=20)
-        reset_text = self.font_medium.render("RESET", True, WHITE)
+        reset_text = self.text.render(self.font_medium, "RESET", True, WHITE)
         screen.blit(reset_text, (400 - reset_text.get_width()//2, 480 - reset_text.get_height()//2))  # Adjusted y position
 
         # Back Button (moved down to y=520)
@@ -714,12 +683,11 @@ class Game:
         back_color = HOVER_COLOR if back_btn.collidepoint(pygame.mouse.get_pos()) else (60, 60, 60)
         pygame.draw.rect(screen, BORDER_COLOR, back_btn, 5, border_radius=20)
         pygame.draw.rect(screen, back_color, back_btn.inflate(-10, -10), border_radius=20)
-        back_text = self.font_medium.render("BACK", True, TEXT_COLOR)
+        back_text = self.text.render(self.font_medium, "BACK", True, TEXT_COLOR)
         screen.blit(back_text, (400 - back_text.get_width()//2, 550 - back_text.get_height()//2))  # Adjusted y position
 
         self.update_buttons()
         self.draw_music_button()
-        pygame.display.flip()
 
     def handle_high_scores_events(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -733,85 +701,65 @@ class Game:
             back_btn = pygame.Rect(300, 520, 200, 60)
             
             if reset_btn.collidepoint(mouse_pos):
-             if self.show_reset_confirmation(): 
-                self.high_scores = {
-                    "MEDIUM": {"time": float('inf'), "date": ""},
-                    "HARD": {"time": float('inf'), "date": ""},
-                    "EXTREME": {"time": float('inf'), "date": ""}
-                }
-                self.save_high_scores()
-            
-            if back_btn.collidepoint(mouse_pos):
+                self.state = RESET_CONFIRM
+            elif back_btn.collidepoint(mouse_pos):
                 self.state = MAIN_MENU
-    
-    def show_reset_confirmation(self):
+
+    def draw_reset_confirmation(self):
         screen.fill(BACKGROUND_COLOR)
-        font = pygame.font.Font(None, 36)
-        confirm_text = font.render("Reset all high scores? (Y/N)", True, WHITE)
+        font = self.fonts.get(None, 36)
+        confirm_text = self.text.render(font, "Reset all high scores? (Y/N)", True, WHITE)
         screen.blit(confirm_text, (400 - confirm_text.get_width()//2, HEIGHT//2))
-        pygame.display.flip()
 
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_y:
-                        return True
-                    elif event.key == pygame.K_n:
-                        return False
-        return False
+    def handle_reset_confirmation_events(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_y:
+                self.scores.reset()
+                self.state = HIGH_SCORES
+            elif event.key == pygame.K_n:
+                self.state = HIGH_SCORES
+
     def start_game(self, difficulty):
         self.difficulty = difficulty
         self.state = GAME
         self.goal_reached = False
-        self.collected_keys = 0
-        self.bullets = []
         if difficulty == "MEDIUM":
-            self.init_level(1)
+            level = 1
         elif difficulty == "HARD":
-            self.init_level(2)
+            level = 2
         else:
-            self.init_level(3)
-        self.start_time = time.time()
-        pygame.mixer.music.stop()
-        pygame.mixer.music.load("bgm.mp3")
-        pygame.mixer.music.play(-1)
-
-    def init_level(self, level):
-        self.grid = [[1 if (row < 2 or row >= ROWS - 2 or col < 2 or col >= COLS - 2) else 1
-                      for col in range(COLS)] for row in range(ROWS)]
-        DIRECTIONS = [(2, 0), (-2, 0), (0, 2), (0, -2)]
-        self.carve_maze(3, 3, DIRECTIONS)
-        self.start_pos = (3, 3)
-        self.end_pos = (COLS - 5, ROWS - 5)
-        self.grid[self.end_pos[1]][self.end_pos[0]] = 0
-        self.player_x, self.player_y = self.start_pos[0] * CELL_SIZE, self.start_pos[1] * CELL_SIZE + MAZE_OFFSET
-        self.goal_x, self.goal_y = self.end_pos[0] * CELL_SIZE, self.end_pos[1] * CELL_SIZE + MAZE_OFFSET
-        try:
-            self.bg = pygame.image.load("back.png").convert()
-            self.bg = pygame.transform.scale(self.bg, (WIDTH, HEIGHT))
-            if self.selected_player == 6 and self.custom_player_image:
-                self.player_image = self.custom_player_image
-            else:
-                self.player_image = pygame.image.load(f"player{self.selected_player+1}.png").convert_alpha()
-            self.player_image = pygame.transform.scale(self.player_image, (CELL_SIZE - 6, CELL_SIZE - 6))
-            if level == 3:
-                self.key_image = pygame.image.load("key.png").convert_alpha()
-                self.key_image = pygame.transform.scale(self.key_image, (CELL_SIZE - 10, CELL_SIZE - 10))
-            self.enemy_image = pygame.image.load("enemy.png").convert_alpha()
-            self.enemy_image = pygame.transform.scale(self.enemy_image, (CELL_SIZE - 6, CELL_SIZE - 6))
-        except:
-            self.bg = pygame.Surface((WIDTH, HEIGHT))
-            self.bg.fill((100, 100, 100))
-            self.player_image = pygame.Surface((CELL_SIZE - 6, CELL_SIZE - 6))
-            self.player_image.fill((0, 0, 255))
-            if level == 3:
-                self.key_image = pygame.Surface((CELL_SIZE - 10, CELL_SIZE - 10))
-                self.key_image.fill((255, 255, 0))
-            self.enemy_image = pygame.Surface((CELL_SIZE - 6, CELL_SIZE - 6))
-            self.enemy_image.fill((255, 0, 0))
+            level = 3
+        self.init_level(level, self.pick_seed(level))
+        self.last_step_time = time.perf_counter()
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self.audio.play_music("bgm.mp3")
+
+    def pick_seed(self, level):
+        # A vetted seed for this level and maze size, if the catalogue has one
+        if self.catalogue is None:
+            return None
+        rows, cols = self.maze_size or LEVEL_MAZES[level][1:]
+        return self.catalogue.pick(level, rows, cols)
+
+    def init_level(self, level, seed=None):
+        global ROWS, COLS, CELL_SIZE
+        # The seed is kept with the run's score so the maze can be played again
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.stop_recording()
+        self.world = MazeWorld(level, seed, self.maze_size)
+        # The new maze's lists are scanned by the collector once, here, rather
+        # than by whichever game frame happens to trigger it
+        gc.collect()
+        if self.record_dir:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-level{level}-{seed}.replay"
+            self.recorder = Recorder(os.path.join(self.record_dir, name), self.world, seed)
+        self.world.profiler = self.profiler
+        ROWS, COLS = self.world.rows, self.world.cols
+        CELL_SIZE = max(MIN_CELL_SIZE, min(WIDTH // COLS, (HEIGHT - MAZE_OFFSET) // ROWS))
+        self.load_level_images()
         MOVES = {
             "UP": (0, -1),
             "DOWN": (0, 1),
@@ -819,239 +767,288 @@ class Game:
             "RIGHT": (1, 0)
         }
         keys = [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]
-        random.shuffle(keys)
+        random.Random(seed).shuffle(keys)
         self.controls = {
             keys[0]: MOVES["UP"],
             keys[1]: MOVES["DOWN"],
             keys[2]: MOVES["LEFT"],
             keys[3]: MOVES["RIGHT"]
         }
-        self.enemies = []
-        if level >= 2:
-            e = [
-                Enemy(COLS // 2, ROWS // 2, self.enemy_image, self.grid),
-                Enemy(COLS - 2, ROWS - 2, self.enemy_image, self.grid),
-                Enemy(COLS // 2, ROWS // 4, self.enemy_image, self.grid)
-            ]
-            random.shuffle(e)
-            self.enemies = [e[0], e[1], e[2]]
-        self.keys = []
-        if level == 3:
-            self.keys = self.generate_key_positions(3)
-
-    def carve_maze(self, x, y, DIRECTIONS):
-        self.grid[y][x] = 0
-        random.shuffle(DIRECTIONS)
-        for dx, dy in DIRECTIONS:
-            nx, ny = x + dx, y + dy
-            if 1 <= nx < COLS - 1 and 1 <= ny < ROWS - 1 and self.grid[ny][nx] == 1:
-                self.grid[y + dy // 2][x + dx // 2] = 0
-                self.carve_maze(nx, ny, DIRECTIONS)
-
-    def generate_key_positions(self, num_keys):
-        key_positions = []
-        while len(key_positions) < num_keys:
-            x, y = random.randint(1, COLS - 2), random.randint(1, ROWS - 2)
-            if self.grid[y][x] == 0 and (x, y) != self.start_pos and (x, y) != self.end_pos and (x, y) not in key_positions:
-                key_positions.append((x, y))
-        return key_positions
-
-    def run_game(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            elif event.type == pygame.VIDEORESIZE:
-                self.update_screen_size(event.w, event.h)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if hasattr(self, 'exit_button') and self.exit_button.collidepoint(event.pos):
-                    self.state = MAIN_MENU
-                elif hasattr(self, 'music_button') and self.music_button.collidepoint(event.pos):
-                    self.toggle_music()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_p:  # Pause with P key
-                    self.paused = not self.paused
-                    if self.paused:
-                        pygame.mixer.music.pause()
-                    else:
-                        pygame.mixer.music.unpause()
-
-        # If game is paused, only draw the pause screen
+        self.build_maze_layer()
+
+    def handle_game_events(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.exit_button.collidepoint(event.pos):
+                self.state = MAIN_MENU
+            elif self.music_button.collidepoint(event.pos):
+                self.toggle_music()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_p:  # Pause with P key
+                self.toggle_pause()
+            elif event.key == pygame.K_F3:
+                self.toggle_profiler()
+
+    def update_game(self):
+        frame_time = self.frame_time()
         if self.paused:
-            self.draw_pause_screen()
             return
 
+        # The world always advances in TICK steps; a slow frame runs several
+        # steps and a fast one may run none, so game speed ignores the frame rate
+        self.accumulator += frame_time
+        inputs = self.read_inputs()
+        # The frame's pathfinding budget is shared by the steps it runs
+        self.world.ai_budget_us = AI_FRAME_BUDGET_US / max(1, int(self.accumulator / TICK))
+        while self.accumulator >= TICK and self.world.status == PLAYING:
+            self.world.step(TICK, inputs)
+            if self.recorder:
+                self.recorder.record(self.world, inputs)
+            self.accumulator -= TICK
+        self.alpha = min(self.accumulator / TICK, 1.0)
+        for event in self.world.drain_events():
+            self.audio.play(event)
+
+        if self.world.status != PLAYING:
+            self.stop_recording()
+        if self.world.status == LOST:
+            self.state = GAME_OVER
+            self.audio.stop_music(fade_ms=0)
+            self.audio.play("game_over")
+        elif self.world.status == WON:
+            self.goal_reached = True
+            self.elapsed_time = self.world.elapsed
+            self.new_high_score = self.update_high_score(self.difficulty, self.elapsed_time)
+            self.state = GAME_WON
+            self.audio.stop_music(fade_ms=0)
+            self.audio.play("game_win")
+
+    def stop_recording(self):
+        # Runs left unfinished are saved when the next one starts or the game quits
+        if self.recorder:
+            self.recorder.close(self.world)
+            self.recorder = None
+
+    def read_inputs(self):
         keys_pressed = pygame.key.get_pressed()
-        if self.difficulty in ["HARD", "EXTREME"]:
-            if keys_pressed[pygame.K_w]: self.shoot("up")
-            if keys_pressed[pygame.K_s]: self.shoot("down")
-            if keys_pressed[pygame.K_a]: self.shoot("left")
-            if keys_pressed[pygame.K_d]: self.shoot("right")
+        shoot = []
+        if keys_pressed[pygame.K_w]: shoot.append("up")
+        if keys_pressed[pygame.K_s]: shoot.append("down")
+        if keys_pressed[pygame.K_a]: shoot.append("left")
+        if keys_pressed[pygame.K_d]: shoot.append("right")
 
-        vel_x, vel_y = 0, 0
+        move_x, move_y = 0, 0
         for key, move in self.controls.items():
             if keys_pressed[key]:
-                vel_x += move[0] * PLAYER_SPEED
-                vel_y += move[1] * PLAYER_SPEED
-
-        new_x, new_y = self.player_x + vel_x, self.player_y + vel_y
-        if self.can_move(new_x, self.player_y):
-            self.player_x = new_x
-        if self.can_move(self.player_x, new_y):
-            self.player_y = new_y
-
-        if self.difficulty in ["HARD", "EXTREME"]:
-            self.move_bullets()
-
-        for enemy in self.enemies:
-            enemy.move_towards_player(self.player_x, self.player_y)
-            if enemy.check_collision(self.player_x, self.player_y):
-                self.state = GAME_OVER
-                pygame.mixer.music.stop()
-                return
-
-        if self.difficulty == "EXTREME":
-            player_grid_x = int(self.player_x // CELL_SIZE)
-            player_grid_y = int((self.player_y - MAZE_OFFSET) // CELL_SIZE)
-            for key_pos in self.keys[:]:
-                if (player_grid_x, player_grid_y) == key_pos:
-                    self.keys.remove(key_pos)
-                    self.collected_keys += 1
-                    self.key_pickup_sound.play() 
-
-        player_rect = pygame.Rect(self.player_x + 10, self.player_y + 10, CELL_SIZE - 15, CELL_SIZE - 15)
-        goal_rect = pygame.Rect(self.goal_x, self.goal_y, CELL_SIZE, CELL_SIZE)
-        if player_rect.colliderect(goal_rect):
-            if self.difficulty != "EXTREME" or (self.difficulty == "EXTREME" and self.collected_keys == 3):
-                self.goal_reached = True
-                self.elapsed_time = time.time() - self.start_time
-                is_new_high_score = self.update_high_score(self.difficulty, self.elapsed_time)
-                self.state = GAME_WON
-                pygame.mixer.music.stop()
-
-        self.draw_game()
+                move_x += move[0]
+                move_y += move[1]
+        return Inputs(move_x, move_y, shoot)
+
+    def to_screen(self, x, y):
+        return self.camera.to_screen(x, y)
+
+    def lerp_to_screen(self, prev_x, prev_y, x, y):
+        # Position between the last two simulation steps
+        alpha = self.alpha
+        return self.to_screen(prev_x + (x - prev_x) * alpha, prev_y + (y - prev_y) * alpha)
+
+    def build_maze_layer(self):
+        # What stays on screen while the camera is still is composited into
+        # maze_layer: the background and pause button, then the maze
+        self.camera = Camera(CELL_SIZE, (0, MAZE_OFFSET, WIDTH, HEIGHT - MAZE_OFFSET), COLS, ROWS)
+        self.follow_player()
+        layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        layer.blit(self.bg, (0, 0))
 
-    def draw_game(self):
-        screen.blit(self.bg, (0, 0))
-        
         # Draw pause button
         pause_button = pygame.Rect(WIDTH - 170, 10, 100, 30)
-        pygame.draw.rect(screen, (200, 200, 200), pause_button)
-        font = pygame.font.Font(None, 24)
-        pause_text = font.render("PAUSE (P)", True, BLACK)
-        screen.blit(pause_text, (pause_button.x + 10, pause_button.y + 5))
-        
-        for row in range(ROWS):
-            for col in range(COLS):
-                if self.grid[row][col] == 0:
-                    pygame.draw.rect(screen, (200, 200, 200, 50),
-                                     (col * CELL_SIZE, row * CELL_SIZE + MAZE_OFFSET, CELL_SIZE, CELL_SIZE))
+        pygame.draw.rect(layer, (200, 200, 200), pause_button)
+        font = self.fonts.get(None, 24)
+        pause_text = self.text.render(font, "PAUSE (P)", True, BLACK)
+        layer.blit(pause_text, (pause_button.x + 10, pause_button.y + 5))
+        self.hud_layer = layer
+        self.maze_layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.maze_region = None
+        self.compose_maze_layer()
+
+    def follow_player(self):
+        world = self.world
+        alpha = self.alpha
+        x = world.prev_player_x + (world.player_x - world.prev_player_x) * alpha
+        y = world.prev_player_y + (world.player_y - world.prev_player_y) * alpha
+        return self.camera.follow(x + PLAYER_SIZE / 2, y + PLAYER_SIZE / 2)
+
+    def compose_maze_layer(self):
+        camera = self.camera
+        view = pygame.Rect(camera.offset_x, camera.offset_y, camera.view.width, camera.view.height)
+        if self.maze_region is None or not self.region_rect.contains(view):
+            self.build_maze_region()
+        layer = self.maze_layer
+        layer.blit(self.hud_layer, (0, 0))
+        layer.set_clip(camera.view)
+        layer.blit(self.maze_region, camera.to_screen(self.region_rect.x / CELL_SIZE, self.region_rect.y / CELL_SIZE))
+        layer.set_clip(None)
+        self.full_redraw = True
+
+    def build_maze_region(self):
+        # The cells around the view, in world pixels; walls are left transparent
+        camera = self.camera
+        cols, rows = camera.visible_cells(REGION_MARGIN)
+        self.region_rect = pygame.Rect(cols.start * CELL_SIZE, rows.start * CELL_SIZE,
+                                       len(cols) * CELL_SIZE, len(rows) * CELL_SIZE)
+        region = pygame.Surface(self.region_rect.size).convert()
+        region.fill(MAZE_KEY)
+        left, top = self.region_rect.topleft
+        grid = self.world.grid
+        for row in rows:
+            # Each run of open cells in a row is one rect
+            line, run_start = grid[row], None
+            for col in range(cols.start, cols.stop + 1):
+                is_open = col < cols.stop and line[col] == 0
+                if is_open and run_start is None:
+                    run_start = col
+                elif not is_open and run_start is not None:
+                    region.fill((200, 200, 200), (run_start * CELL_SIZE - left, row * CELL_SIZE - top,
+                                                  (col - run_start) * CELL_SIZE, CELL_SIZE))
+                    run_start = None
         radius = CELL_SIZE
         corners = [
-            (0, MAZE_OFFSET),
-            (COLS * CELL_SIZE - radius, MAZE_OFFSET),
-            (0, ROWS * CELL_SIZE - radius + MAZE_OFFSET),
-            (COLS * CELL_SIZE - radius, ROWS * CELL_SIZE - radius + MAZE_OFFSET)
+            (0, 0),
+            (COLS * CELL_SIZE - radius, 0),
+            (0, ROWS * CELL_SIZE - radius),
+            (COLS * CELL_SIZE - radius, ROWS * CELL_SIZE - radius)
         ]
         for x, y in corners:
-            pygame.draw.arc(screen, BLACK, (x, y, radius, radius), 0, 1.57, 5)
-        if not self.goal_reached:
-            pygame.draw.rect(screen, GREEN, (self.goal_x, self.goal_y, CELL_SIZE, CELL_SIZE))
-        if self.difficulty == "EXTREME":
-            for x, y in self.keys:
-                screen.blit(self.key_image, (x * CELL_SIZE, y * CELL_SIZE + MAZE_OFFSET))
-        if self.difficulty in ["HARD", "EXTREME"]:
-            for bullet in self.bullets:
-                pygame.draw.rect(screen, BLACK, (bullet[0], bullet[1], 6, 6))
-        for enemy in self.enemies:
-            enemy.draw(screen)
-        screen.blit(self.player_image, (self.player_x, self.player_y))
+            pygame.draw.arc(region, BLACK, (x - left, y - top, radius, radius), 0, 1.57, 5)
+        pygame.draw.rect(region, GREEN, (self.world.goal_x * CELL_SIZE - left, self.world.goal_y * CELL_SIZE - top,
+                                         CELL_SIZE, CELL_SIZE))
+        region.set_colorkey(MAZE_KEY, pygame.RLEACCEL)
+        self.maze_region = region
+
+    def draw_game(self):
+        # Restore the maze under whatever moved last frame, draw the moving
+        # parts and only push those regions to the display.
+        if self.paused:
+            self.draw_pause_screen()
+            return None
+        dirty = self.render_game()
+        changed = None if self.full_redraw else self.dirty_rects + dirty
+        if changed is not None and len(changed) > DIRTY_RECT_LIMIT:
+            changed = None
+        self.full_redraw = False
+        self.dirty_rects = dirty
+        return changed
+
+    def present(self, changed):
+        if changed is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(changed)
+
+    def render_game(self):
+        # Only what is inside the view (plus a margin) is drawn, so the cost
+        # follows the screen size rather than the maze size
+        world = self.world
+        camera = self.camera
+        if self.follow_player():
+            self.compose_maze_layer()
+        if self.full_redraw:
+            screen.blit(self.maze_layer, (0, 0))
+        else:
+            for rect in self.dirty_rects:
+                screen.blit(self.maze_layer, rect, rect)
+        dirty = []
+        screen.set_clip(camera.view)
+        for x, y in world.keys:
+            if camera.is_visible(x, y, 1, CULL_MARGIN):
+                dirty.append(screen.blit(self.key_image, self.to_screen(x, y)))
+        # Bullets fly straight, so their previous position is one step back
+        lag = (1 - self.alpha) * BULLET_SPEED * TICK
+        for bx, by, dx, dy in world.bullets:
+            if camera.is_visible(bx, by, 0, CULL_MARGIN):
+                dirty.append(pygame.draw.rect(screen, BLACK, (*self.to_screen(bx - dx * lag, by - dy * lag), 6, 6)))
+        # The spatial hash holds enemies by cell, so only the view's cells are visited
+        for enemy in dict.fromkeys(world.enemy_hash.query(*camera.world_view(CULL_MARGIN))):
+            if enemy.is_visible:
+                position = self.lerp_to_screen(enemy.prev_x, enemy.prev_y, enemy.pos_x, enemy.pos_y)
+                dirty.append(screen.blit(self.enemy_image, position))
+        position = self.lerp_to_screen(world.prev_player_x, world.prev_player_y, world.player_x, world.player_y)
+        dirty.append(screen.blit(self.player_image, position))
+        screen.set_clip(None)
         self.update_buttons()
         self.draw_buttons()
-        elapsed_time = time.time() - self.start_time
-        self.draw_timer(elapsed_time)
-        if self.difficulty == "EXTREME":
-            key_text = self.font_small.render(f"Keys: {self.collected_keys}/3", True, WHITE)
-            screen.blit(key_text, (WIDTH - 150, self.music_button.y + self.music_button.height + 10))
-        pygame.display.flip()
-        self.clock.tick(60)
-
-    def can_move(self, new_x, new_y):
-        player_rect = pygame.Rect(new_x, new_y, CELL_SIZE - 6, CELL_SIZE - 6)
-        for row in range(ROWS):
-            for col in range(COLS):
-                if self.grid[row][col] == 1:
-                    wall_rect = pygame.Rect(col * CELL_SIZE, row * CELL_SIZE + MAZE_OFFSET, CELL_SIZE, CELL_SIZE)
-                    if player_rect.colliderect(wall_rect):
-                        return False
-        return True
-
-    def shoot(self, direction):
-        self.shoot_sound.play()
-        if direction == "up":
-            self.bullets.append((self.player_x + CELL_SIZE // 2, self.player_y, 0, -1))
-        elif direction == "down":
-            self.bullets.append((self.player_x + CELL_SIZE // 2, self.player_y + CELL_SIZE, 0, 1))
-        elif direction == "left":
-            self.bullets.append((self.player_x, self.player_y + CELL_SIZE // 2, -1, 0))
-        elif direction == "right":
-            self.bullets.append((self.player_x + CELL_SIZE, self.player_y + CELL_SIZE // 2, 1, 0))
-
-    def move_bullets(self):
-        new_bullets = []
-        for bx, by, dx, dy in self.bullets:
-            new_bx = bx + BULLET_SPEED * dx
-            new_by = by + BULLET_SPEED * dy
-            grid_x = int(new_bx // CELL_SIZE)
-            grid_y = int((new_by - MAZE_OFFSET) // CELL_SIZE)
-            if 0 <= grid_x < COLS and 0 <= grid_y < ROWS and self.grid[grid_y][grid_x] == 1:
-                continue
-            bullet_rect = pygame.Rect(new_bx, new_by, 6, 6)
-            hit_enemy = None
-            for enemy in self.enemies:
-                enemy_rect = pygame.Rect(enemy.pixel_x, enemy.pixel_y, CELL_SIZE - 6, CELL_SIZE - 6)
-                if bullet_rect.colliderect(enemy_rect):
-                    hit_enemy = enemy
-                    break
-            if hit_enemy:
-                self.enemy_killed_sound.play()
-                self.enemies.remove(hit_enemy)
-                start_x, start_y = self.get_random_spawn()
-                new_enemy = Enemy(start_x, start_y, hit_enemy.image, self.grid)
-                self.enemies.append(new_enemy)
-            else:
-                new_bullets.append((new_bx, new_by, dx, dy))
-        self.bullets = new_bullets
+        dirty.append(self.exit_button)
+        dirty.append(self.music_button)
+        dirty.append(self.draw_timer(world.elapsed))
+        if world.needs_keys:
+            key_text = self.text.render(self.font_small, f"Keys: {world.collected_keys}/3", True, WHITE)
+            dirty.append(screen.blit(key_text, (WIDTH - 150, self.music_button.y + self.music_button.height + 10)))
+        if self.show_profiler:
+            dirty.append(self.draw_profiler_overlay())
+        return dirty
+
+    def draw_profiler_overlay(self):
+        # Percentiles change every frame, so the panel is rebuilt a few times a
+        # second with plain font.render rather than filling the text cache.
+        now = time.perf_counter()
+        if self.profiler_overlay is None or now - self.profiler_overlay_time > 0.25:
+            font = self.fonts.get(None, 20)
+            stats = self.profiler.stats()
+            lines = ["zone        p50    p95    p99 ms"]
+            for name, (p50, p95, p99) in stats.items():
+                lines.append(f"{name:<9} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+            audio = self.audio.stats()
+            lines.append(f"audio {sum(audio['busy'].values())}/{audio['channels']} ch, "
+                         f"decode {audio['decode_ms']:.0f} ms, dropped {audio['cooldown'] + audio['voice_limit']}")
+            if self.state == GAME:
+                ai = self.world.ai.stats()
+                lines.append(f"ai queue {ai['queue']}, {ai['replans_per_second']:.0f} replans/s, "
+                             f"deferred {ai['deferred']}/{ai['runs']}, overruns {ai['overruns']}")
+            if self.first_frame_time is not None:
+                lines.append(f"first frame {self.first_frame_time * 1000:.0f} ms")
+            rendered = [font.render(line, True, GREEN) for line in lines]
+            line_height = font.get_linesize()
+            width = max(surface.get_width() for surface in rendered) + 8
+            overlay = pygame.Surface((width, line_height * len(rendered) + 8))
+            overlay.fill(BLACK)
+            for i, surface in enumerate(rendered):
+                overlay.blit(surface, (4, 4 + i * line_height))
+            self.profiler_overlay = overlay
+            self.profiler_overlay_time = now
+        return screen.blit(self.profiler_overlay, (10, HEIGHT - self.profiler_overlay.get_height() - 10))
 
-    def get_random_spawn(self):
-        while True:
-            x = random.randint(1, COLS - 2)
-            y = random.randint(1, ROWS - 2)
-            if self.grid[y][x] == 0:
-                return x, y
 
     def update_screen_size(self, new_width, new_height):
-        global WIDTH, HEIGHT, CELL_SIZE
+        global WIDTH, HEIGHT, CELL_SIZE, screen
         WIDTH, HEIGHT = new_width, new_height
-        CELL_SIZE = min(WIDTH // COLS, HEIGHT // ROWS)
+        CELL_SIZE = max(MIN_CELL_SIZE, min(WIDTH // COLS, (HEIGHT - MAZE_OFFSET) // ROWS))
+        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+        if self.world:
+            self.load_level_images()
+            self.build_maze_layer()
+
+    def load_level_images(self):
+        # Scaled copies come from the asset cache, so resizing back to a size
+        # seen before costs nothing
+        if self.selected_player == 6 and self.custom_player_path:
+            player_path = self.custom_player_path
+        else:
+            player_path = f"player{self.selected_player+1}.png"
         try:
-            self.bg = pygame.transform.scale(pygame.image.load("back.png").convert(), (WIDTH, HEIGHT))
-            if self.selected_player == 6 and self.custom_player_image:
-                self.player_image = pygame.transform.scale(self.custom_player_image, (CELL_SIZE - 6, CELL_SIZE - 6))
-            else:
-                self.player_image = pygame.transform.scale(pygame.image.load(f"player{self.selected_player+1}.png").convert_alpha(), (CELL_SIZE - 6, CELL_SIZE - 6))
-            if self.difficulty == "EXTREME":
-                self.key_image = pygame.transform.scale(pygame.image.load("key.png").convert_alpha(), (CELL_SIZE - 10, CELL_SIZE - 10))
+            self.bg = self.assets.scaled("back.png", (WIDTH, HEIGHT), alpha=False)
+            self.player_image = self.assets.scaled(player_path, (CELL_SIZE - 6, CELL_SIZE - 6))
+            if self.world.needs_keys:
+                self.key_image = self.assets.scaled("key.png", (CELL_SIZE - 10, CELL_SIZE - 10))
+            self.enemy_image = self.assets.scaled("enemy.png", (CELL_SIZE - 6, CELL_SIZE - 6))
         except:
-            pass
-        self.player_x, self.player_y = self.start_pos[0] * CELL_SIZE, self.start_pos[1] * CELL_SIZE + MAZE_OFFSET
-        self.goal_x, self.goal_y = self.end_pos[0] * CELL_SIZE, self.end_pos[1] * CELL_SIZE + MAZE_OFFSET
-        for enemy in self.enemies:
-            enemy.pixel_x = enemy.x * CELL_SIZE
-            enemy.pixel_y = enemy.y * CELL_SIZE + MAZE_OFFSET
-            enemy.target_x = enemy.x * CELL_SIZE
-            enemy.target_y = enemy.y * CELL_SIZE + MAZE_OFFSET
-            enemy.image = pygame.transform.scale(enemy.original_image, (CELL_SIZE - 6, CELL_SIZE - 6))
-        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+            self.bg = pygame.Surface((WIDTH, HEIGHT))
+            self.bg.fill((100, 100, 100))
+            self.player_image = pygame.Surface((CELL_SIZE - 6, CELL_SIZE - 6))
+            self.player_image.fill((0, 0, 255))
+            if self.world.needs_keys:
+                self.key_image = pygame.Surface((CELL_SIZE - 10, CELL_SIZE - 10))
+                self.key_image.fill((255, 255, 0))
+            self.enemy_image = pygame.Surface((CELL_SIZE - 6, CELL_SIZE - 6))
+            self.enemy_image.fill((255, 0, 0))
 
     def update_buttons(self):
         button_width = max(WIDTH // 15, 40)
@@ -1060,112 +1057,85 @@ class Game:
         self.music_button = pygame.Rect(WIDTH - button_width - 10, 10, button_width, button_height)
 
     def draw_buttons(self):
-        font = pygame.font.Font(None, min(WIDTH // 10, 14))
+        font = self.fonts.get(None, min(WIDTH // 10, 14))
         pygame.draw.rect(screen, (0, 200, 0), self.exit_button)
-        exit_text = font.render("BACK", True, BLACK)
+        exit_text = self.text.render(font, "BACK", True, BLACK)
         screen.blit(exit_text, self.exit_button.move(self.exit_button.width // 8, self.exit_button.height // 4))
         self.draw_music_button()
 
     def draw_music_button(self):
-        font = pygame.font.Font(None, min(WIDTH // 10, 14))
+        font = self.fonts.get(None, min(WIDTH // 10, 14))
         music_color = (0, 200, 0) if self.music_on else (200, 0, 0)
         pygame.draw.rect(screen, music_color, self.music_button)
-        music_text = font.render("MUSIC", True, BLACK)
+        music_text = self.text.render(font, "MUSIC", True, BLACK)
         screen.blit(music_text, self.music_button.move(self.music_button.width // 8, self.music_button.height // 4))
 
     def draw_timer(self, elapsed_time):
         elapsed_seconds = int(elapsed_time)
-        font = pygame.font.Font(None, 36)
-        text = font.render(f"Time: {elapsed_seconds}", True, TIMER_COLOR)
+        font = self.fonts.get(None, 36)
+        text = self.text.render(font, f"Time: {elapsed_seconds}", True, TIMER_COLOR)
         text_rect = text.get_rect(midtop=(WIDTH // 2, 10))
-        screen.blit(text, text_rect)
+        return screen.blit(text, text_rect)
 
-    def show_game_over(self):
-        self.game_over_sound.play()
+    def draw_game_over(self):
         screen.fill(BLACK)
-        font = pygame.font.Font(None, 72)
-        text = font.render("GAME OVER", True, (255, 0, 0))
+        font = self.fonts.get(None, 72)
+        text = self.text.render(font, "GAME OVER", True, (255, 0, 0))
         text_rect = text.get_rect(center=(WIDTH//2, HEIGHT//2 - 50))
         screen.blit(text, text_rect)
         
-        small_font = pygame.font.Font(None, 36)
-        exit_text = small_font.render("Press any key to continue", True, WHITE)
+        small_font = self.fonts.get(None, 36)
+        exit_text = self.text.render(small_font, "Press any key to continue", True, WHITE)
         exit_rect = exit_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 50))
         screen.blit(exit_text, exit_rect)
-        
-        pygame.display.flip()
-        
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    waiting = False
-                elif event.type in [pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN]:
-                    waiting = False
-                    
-        self.end_game()
-
-    def show_game_won(self):
-        self.game_win_sound.play()
+
+    def draw_game_won(self):
         screen.fill(BLACK)
-        font = pygame.font.Font(None, 72)  # Main font
-        small_font = pygame.font.Font(None, 36)  # Smaller font for time
+        font = self.fonts.get(None, 72)  # Main font
+        small_font = self.fonts.get(None, 36)  # Smaller font for time
         
         # Line 1: "Congratulations, YOU escaped!"
-        text1 = font.render("Congratulations, YOU escaped!", True, GREEN)
+        text1 = self.text.render(font, "Congratulations, YOU escaped!", True, GREEN)
         text1_rect = text1.get_rect(center=(WIDTH//2, HEIGHT//2 - 70))
         screen.blit(text1, text1_rect)
         
         # Line 2: "Time: XXs"
-        text2 = small_font.render(f"Time: {int(self.elapsed_time)}s", True, GREEN)
+        text2 = self.text.render(small_font, f"Time: {int(self.elapsed_time)}s", True, GREEN)
         text2_rect = text2.get_rect(center=(WIDTH//2, HEIGHT//2 - 10))
         screen.blit(text2, text2_rect)
         
         # Rest of the code (high score check, exit prompt)
-        is_new = self.update_high_score(self.difficulty, self.elapsed_time)
-        if is_new:
-            hs_text = font.render("NEW HIGH SCORE!", True, (255, 215, 0))
+        if self.new_high_score:
+            hs_text = self.text.render(font, "NEW HIGH SCORE!", True, (255, 215, 0))
             hs_rect = hs_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 50))
             screen.blit(hs_text, hs_rect)
         
-        exit_text = small_font.render("Press any key for credits", True, WHITE)
+        exit_text = self.text.render(small_font, "Press any key for credits", True, WHITE)
         exit_rect = exit_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 120))
         screen.blit(exit_text, exit_rect)
-        
-        pygame.display.flip()
-        
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    waiting = False
-                elif event.type in [pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN]:
-                    waiting = False
-                    
-        self.end_game()
-
-    def show_credits(self):
-        WIDTH, HEIGHT = 800, 600
-        screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Cinematic End Credits")
-
-        BLACK = (0, 0, 0)
-        WHITE = (255, 255, 255)
+
+    def start_credits(self):
+        self.credits_scroll = 0.0
+        self.credits_content = None
+        self.last_step_time = time.perf_counter()
+        self.audio.play_music("music.mp3", volume=0.5)
+        self.state = CREDITS
+
+    def build_credits(self):
+        # Text and star layers are drawn once for the current window size
         GOLD = (255, 215, 0)
 
         # Fonts
         try:
-            title_font = pygame.font.Font('kuku.ttf', 60)
-            name_font = pygame.font.Font('la.ttf', 40)
-            role_font = pygame.font.Font('pu.ttf', 30)
-            extra_font = pygame.font.Font('mi.ttf', 60)
+            title_font = self.fonts.get('kuku.ttf', 60)
+            name_font = self.fonts.get('la.ttf', 40)
+            role_font = self.fonts.get('pu.ttf', 30)
+            extra_font = self.fonts.get('mi.ttf', 60)
         except:
-            title_font = pygame.font.SysFont(None, 60)
-            name_font = pygame.font.SysFont(None, 40)
-            role_font = pygame.font.SysFont(None, 30)
-            extra_font = pygame.font.SysFont(None, 60)
+            title_font = self.fonts.get(None, 60)
+            name_font = self.fonts.get(None, 40)
+            role_font = self.fonts.get(None, 30)
+            extra_font = self.fonts.get(None, 60)
 
         credits = [
             ("A Game By", None), ("Team i2D", None),
@@ -1179,8 +1149,9 @@ class Game:
             ("THE END", None),
         ]
 
-        credit_items = []
-        for text, role in credits:
+        spacing = CREDITS_SPACING
+        content = ScrollingContent(WIDTH, (len(credits) + 1) * spacing, BLACK)
+        for i, (text, role) in enumerate(credits):
             if text == "THE END":
                 color = GOLD
                 font = title_font
@@ -1194,135 +1165,123 @@ class Game:
                 font = role_font
                 color = WHITE
 
+            center_y = spacing + i * spacing
             text_surface = font.render(text, True, color)
-            text_rect = text_surface.get_rect(centerx=WIDTH // 2)
-
+            content.blit(text_surface, text_surface.get_rect(centerx=WIDTH // 2, centery=center_y))
             if role:
                 role_surface = role_font.render(role, True, (200, 200, 200))
-                role_rect = role_surface.get_rect(centerx=WIDTH // 2)
-                credit_items.append((text_surface, text_rect, role_surface, role_rect))
-            else:
-                credit_items.append((text_surface, text_rect, None, None))
-
-        scroll_speed = 4
-        y_position = HEIGHT
-        spacing = 60
-        total_height = len(credits) * spacing + HEIGHT
-
-        stars = [(random.randint(0, WIDTH), random.randint(0, total_height), random.randint(1, 3)) for _ in range(100)]
-
-        try:
-            pygame.mixer.music.stop()
-            pygame.mixer.music.load("music.mp3")
-            pygame.mixer.music.set_volume(0.5)
-            pygame.mixer.music.play(-1)
-        except:
-            print("No credit music found or failed to load.")
-
-        clock = pygame.time.Clock()
-        running = True
-
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                    running = False
-
-            y_position -= scroll_speed
-            if y_position < -total_height:
-                running = False
-
-            screen.fill(BLACK)
-
-            for x, y, size in stars:
-                adjusted_y = (y + y_position) % total_height
-                pygame.draw.circle(screen, WHITE, (x, adjusted_y), size)
-
-            current_y = y_position
-            for item in credit_items:
-                text_surface, text_rect, role_surface, role_rect = item
-                if current_y < -spacing or current_y > HEIGHT:
-                    current_y += spacing
-                    continue
-                text_rect.centery = current_y
-                screen.blit(text_surface, text_rect)
-                if role_surface:
-                    role_rect.centery = current_y + 30
-                    screen.blit(role_surface, role_rect)
-                current_y += spacing
+                content.blit(role_surface, role_surface.get_rect(centerx=WIDTH // 2, centery=center_y + 30))
+        self.credits_content = content
+
+        # Small stars are further away and drift slower than the text
+        period = content.height + HEIGHT
+        self.credits_stars = [Starfield(WIDTH, period, HEIGHT, 34, radius, random.Random(radius))
+                              for radius in (1, 2, 3)]
+        self.credits_size = (WIDTH, HEIGHT)
+
+    def handle_credits_events(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.finish_credits()
+
+    def update_credits(self):
+        # The star period and the restart point depend on the height too
+        if self.credits_content is None or self.credits_size != (WIDTH, HEIGHT):
+            self.build_credits()
+        self.credits_scroll += CREDITS_SPEED * self.frame_time()
+        if self.credits_scroll > HEIGHT + self.credits_content.height:
+            self.finish_credits()
+
+    def draw_credits(self):
+        screen.fill(BLACK)
+        for radius, layer in enumerate(self.credits_stars, 1):
+            layer.draw(screen, self.credits_scroll * radius / 3)
+        # The content starts just below the screen and scrolls up through it
+        self.credits_content.draw(screen, self.credits_scroll - HEIGHT, (0, 0), HEIGHT)
 
-            pygame.display.flip()
-            clock.tick(60)
+    def finish_credits(self):
+        self.audio.play_music("music.mp3")
+        self.state = MAIN_MENU
 
-        pygame.mixer.music.stop()
-        try:
-            pygame.mixer.music.load("music.mp3")
-            pygame.mixer.music.play(-1)
-        except:
-            print("Could not load menu music")
+    def handle_end_screen_events(self, event):
+        if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            self.end_game()
 
     def end_game(self):
-        pygame.time.delay(500)
-        self.show_credits()
-        self.state = MAIN_MENU
+        self.start_credits()
 
     def run(self):
+        # The desktop runs the same async loop as the web build
+        asyncio.run(self.run_async())
+        pygame.quit()
+        sys.exit()
+
+    async def run_async(self):
         while self.running:
-            for event in pygame.event.get():
+            self.profiler.begin_frame()
+            self.run_frame()
+            # The only frame cap in the game loop
+            with self.profiler.zone("idle"):
+                await self.scheduler.next_frame()
+            self.profiler.end_frame()
+        self.profiler.close_csv()
+        self.scores.close()
+        self.stop_recording()
+
+    def run_frame(self):
+        # The only place events are pumped; handlers may switch states
+        # mid-batch, so the table is consulted per event
+        input_time = 0
+        with self.profiler.zone("events"):
+            events = pygame.event.get()
+        if not events and self.states[self.state].idle and not self.audio.fading():
+            # Nothing on screen can change until input arrives
+            with self.profiler.zone("idle"):
+                event = self.scheduler.wait_event(IDLE_WAIT_MS)
+            if event.type != pygame.NOEVENT:
+                events = [event] + pygame.event.get()
+        with self.profiler.zone("events"):
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.running = False
-                if self.state == MAIN_MENU:
-                    self.handle_main_menu_events(event)
-                elif self.state == DIFFICULTY_SELECT:
-                    self.handle_difficulty_menu_events(event)
-                elif self.state == PLAYER_SELECT:
-                    self.handle_player_selection_events(event)
-                elif self.state == HELP_SCREEN:
-                    self.handle_help_screen_events(event)
-                elif self.state == HIGH_SCORES:
-                    self.handle_high_scores_events(event)
-                elif self.state == GAME:
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_p:
-                            self.paused = not self.paused
-                            if self.paused:
-                                pygame.mixer.music.pause()
-                            else:
-                                pygame.mixer.music.unpause()
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        if self.exit_button.collidepoint(event.pos):
-                            self.state = MAIN_MENU
-                        elif self.music_button.collidepoint(event.pos):
-                            self.toggle_music()
-                elif self.state == GAME_OVER:
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        self.state = MAIN_MENU
-                elif self.state == GAME_WON:
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        self.state = MAIN_MENU
-
-            if self.state == ANIMATION:
-                self.run_animation()
-                self.state = MAIN_MENU
-            elif self.state == MAIN_MENU:
-                self.draw_main_menu()
-            elif self.state == DIFFICULTY_SELECT:
-                self.draw_difficulty_menu()
-            elif self.state == PLAYER_SELECT:
-                self.draw_player_selection()
-            elif self.state == HELP_SCREEN:
-                self.draw_help_screen()
-            elif self.state == HIGH_SCORES:
-                self.draw_high_scores()
-            elif self.state == GAME:
-                self.run_game()
-            elif self.state == GAME_OVER:
-                self.show_game_over()
-            elif self.state == GAME_WON:
-                self.show_game_won()
-            self.clock.tick(60)
-        pygame.quit()
-        sys.exit()
+                elif event.type == pygame.VIDEORESIZE:
+                    self.update_screen_size(event.w, event.h)
+                elif event.type in INPUT_EVENTS and not input_time:
+                    input_time = time.perf_counter_ns()
+                self.states[self.state].handle(event)
+
+        # Deferred loading trickles along during the intro and is finished
+        # at once when anything else needs it
+        if self.pending_loads:
+            self.load_pending(LOAD_BUDGET if self.state == ANIMATION else None)
+
+        # update() may hand over to another state, which then renders
+        self.states[self.state].update()
+        self.audio.update()
+        with self.profiler.zone("draw"):
+            changed = self.states[self.state].render()
+        with self.profiler.zone("present"):
+            self.present(changed)
+        if input_time:
+            self.profiler.record_latency(time.perf_counter_ns() - input_time)
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - START_TIME
+            if self.quit_after_first_frame:
+                print(f"time_to_first_frame {self.first_frame_time * 1000:.1f} ms")
+                self.running = False
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="MYSTIC MAIZE")
+    parser.add_argument("--profile", action="store_true", help="show the frame profiler overlay (toggle in game with F3)")
+    parser.add_argument("--profile-csv", metavar="PATH", help="write per-frame profiler timings to a CSV file")
+    parser.add_argument("--maze-size", type=int, metavar="CELLS",
+                        help="play square mazes of this many cells a side; large ones scroll")
+    parser.add_argument("--record", metavar="DIR", help="save every run's inputs to DIR for replay.py")
+    parser.add_argument("--time-to-first-frame", action="store_true",
+                        help="print the time from start to the first presented frame, then quit")
+    args = parser.parse_args()
+    game = Game(profile=args.profile, profile_csv=args.profile_csv)
+    if args.maze_size:
+        game.maze_size = (args.maze_size, args.maze_size)
+    game.record_dir = args.record
+    game.quit_after_first_frame = args.time_to_first_frame
     game.run()
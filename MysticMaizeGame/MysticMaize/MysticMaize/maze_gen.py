@@ -0,0 +1,160 @@
+import random
+
+WALL = 1
+OPEN = 0
+STEPS = [(2, 0), (-2, 0), (0, 2), (0, -2)]
+
+
+class MazeGrid:
+    # Compact row-major byte grid. grid[y][x] reads and writes like the old
+    # list-of-lists, each row being a memoryview into one bytearray.
+    def __init__(self, rows, cols, fill=WALL):
+        self.rows = rows
+        self.cols = cols
+        self.cells = bytearray([fill]) * (rows * cols)
+        view = memoryview(self.cells)
+        self.row_views = [view[row * cols:(row + 1) * cols] for row in range(rows)]
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        return self.row_views[row]
+
+    def __iter__(self):
+        return iter(self.row_views)
+
+    def is_cell(self, x, y):
+        # Carvable cells sit on odd coordinates inside the one-cell border
+        return 1 <= x < self.cols - 1 and 1 <= y < self.rows - 1
+
+    def open_cell(self, x, y):
+        self.cells[y * self.cols + x] = OPEN
+
+    def open_between(self, x1, y1, x2, y2):
+        self.cells[((y1 + y2) // 2) * self.cols + (x1 + x2) // 2] = OPEN
+
+    def lattice(self):
+        return [(x, y) for y in range(1, self.rows - 1, 2) for x in range(1, self.cols - 1, 2)]
+
+
+def recursive_backtracker(grid, rng, start):
+    # Depth-first carving with an explicit stack, so size is not limited by
+    # the interpreter's recursion depth.
+    x, y = start
+    grid.open_cell(x, y)
+    directions = STEPS[:]
+    rng.shuffle(directions)
+    stack = [(x, y, directions)]
+    cells, cols = grid.cells, grid.cols
+    while stack:
+        x, y, directions = stack[-1]
+        while directions:
+            dx, dy = directions.pop()
+            nx, ny = x + dx, y + dy
+            if grid.is_cell(nx, ny) and cells[ny * cols + nx] == WALL:
+                grid.open_between(x, y, nx, ny)
+                grid.open_cell(nx, ny)
+                next_directions = STEPS[:]
+                rng.shuffle(next_directions)
+                stack.append((nx, ny, next_directions))
+                break
+        else:
+            stack.pop()
+
+
+def kruskal(grid, rng, start):
+    cols = grid.cols
+    parent = {}
+
+    def find(cell):
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return root
+
+    edges = []
+    for x, y in grid.lattice():
+        index = y * cols + x
+        parent[index] = index
+        grid.open_cell(x, y)
+        if grid.is_cell(x + 2, y):
+            edges.append((x, y, x + 2, y))
+        if grid.is_cell(x, y + 2):
+            edges.append((x, y, x, y + 2))
+    rng.shuffle(edges)
+    for x1, y1, x2, y2 in edges:
+        root1, root2 = find(y1 * cols + x1), find(y2 * cols + x2)
+        if root1 != root2:
+            parent[root1] = root2
+            grid.open_between(x1, y1, x2, y2)
+
+
+def prim(grid, rng, start):
+    cells, cols = grid.cells, grid.cols
+    x, y = start
+    grid.open_cell(x, y)
+    frontier = [(x, y, x + dx, y + dy) for dx, dy in STEPS if grid.is_cell(x + dx, y + dy)]
+    while frontier:
+        # Swap-remove a random frontier edge in O(1)
+        index = rng.randrange(len(frontier))
+        frontier[index], frontier[-1] = frontier[-1], frontier[index]
+        x1, y1, x2, y2 = frontier.pop()
+        if cells[y2 * cols + x2] != WALL:
+            continue
+        grid.open_between(x1, y1, x2, y2)
+        grid.open_cell(x2, y2)
+        for dx, dy in STEPS:
+            nx, ny = x2 + dx, y2 + dy
+            if grid.is_cell(nx, ny) and cells[ny * cols + nx] == WALL:
+                frontier.append((x2, y2, nx, ny))
+
+
+def wilson(grid, rng, start):
+    # Loop-erased random walks; produces a uniform spanning tree.
+    cols = grid.cols
+    lattice = grid.lattice()
+    in_tree = bytearray(grid.rows * cols)
+    x, y = start
+    in_tree[y * cols + x] = 1
+    grid.open_cell(x, y)
+    rng.shuffle(lattice)
+    for cx, cy in lattice:
+        if in_tree[cy * cols + cx]:
+            continue
+        # Walk until the tree is hit, remembering the last exit from each
+        # cell; following those exits afterwards erases the loops.
+        exits = {}
+        x, y = cx, cy
+        while not in_tree[y * cols + x]:
+            while True:
+                dx, dy = STEPS[rng.randrange(4)]
+                if grid.is_cell(x + dx, y + dy):
+                    break
+            exits[y * cols + x] = (dx, dy)
+            x, y = x + dx, y + dy
+        x, y = cx, cy
+        while not in_tree[y * cols + x]:
+            dx, dy = exits[y * cols + x]
+            in_tree[y * cols + x] = 1
+            grid.open_cell(x, y)
+            grid.open_between(x, y, x + dx, y + dy)
+            x, y = x + dx, y + dy
+
+
+ALGORITHMS = {
+    "backtracker": recursive_backtracker,
+    "kruskal": kruskal,
+    "prim": prim,
+    "wilson": wilson,
+}
+
+
+def generate(algorithm, rows, cols, seed=None, start=(3, 3)):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown maze algorithm: {algorithm}")
+    grid = MazeGrid(rows, cols)
+    ALGORITHMS[algorithm](grid, random.Random(seed), start)
+    return grid
@@ -0,0 +1,143 @@
+from collections import deque
+
+UNREACHABLE = -1
+CLEAR_RATIO = 16  # Cells cleared per cell searched in one chunk of a rebuild
+NEIGHBOURS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def bfs_distances(grid, goal_x, goal_y):
+    # Steps from every open cell to the goal, as a flat row-major list
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    distances = [UNREACHABLE] * (rows * cols)
+    for _ in bfs_chunks(grid, goal_x, goal_y, distances, rows * cols + 1):
+        pass
+    return distances
+
+
+def bfs_chunks(grid, goal_x, goal_y, distances, chunk):
+    # Fills distances breadth first, pausing after every chunk cells so the
+    # work can be spread over several frames
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    distances[goal_y * cols + goal_x] = 0
+    queue = deque([(goal_x, goal_y)])
+    visited = 0
+    while queue:
+        x, y = queue.popleft()
+        next_distance = distances[y * cols + x] + 1
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < cols and 0 <= ny < rows and grid[ny][nx] == 0:
+                index = ny * cols + nx
+                if distances[index] == UNREACHABLE:
+                    distances[index] = next_distance
+                    queue.append((nx, ny))
+        visited += 1
+        if visited == chunk:
+            visited = 0
+            yield
+
+
+class FlowField:
+    # Breadth-first distance map from a single goal cell (the player).
+    # Shared by every enemy and only rebuilt when the goal cell changes.
+    # A rebuild can also run in chunks with request() and advance(); the
+    # last finished map stays in use until the new one is complete, and the
+    # map it replaces is kept to build the next one in.
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows else 0
+        self.goal = None
+        self.distances = [UNREACHABLE] * (self.rows * self.cols)
+        self.rebuilds = 0
+        self.pending_goal = None
+        self.next_goal = None
+        self.pending = [UNREACHABLE] * (self.rows * self.cols)
+        self.building = None
+        self.chunk = None
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def update(self, goal_x, goal_y):
+        if (goal_x, goal_y) == self.goal or not self.in_bounds(goal_x, goal_y):
+            return False
+        self.rebuild(goal_x, goal_y)
+        return True
+
+    def rebuild(self, goal_x, goal_y):
+        self.building = None
+        self.pending_goal = self.next_goal = None
+        self.distances = bfs_distances(self.grid, goal_x, goal_y)
+        self.goal = (goal_x, goal_y)
+        self.rebuilds += 1
+
+    def request(self, goal_x, goal_y, chunk):
+        # Starts a chunked rebuild. One already running is left to finish,
+        # or it would never finish on a large maze while the player walks;
+        # the latest goal is built next. Coming back to the current goal
+        # drops the running build, or it would be swapped in for a cell the
+        # goal has already left.
+        goal = (goal_x, goal_y)
+        if goal == self.goal:
+            self.building = self.pending_goal = self.next_goal = None
+            return False
+        if not self.in_bounds(goal_x, goal_y):
+            return False
+        if self.building is not None:
+            self.next_goal = None if goal == self.pending_goal else goal
+            return False
+        self.start(goal, chunk)
+        return True
+
+    def start(self, goal, chunk):
+        self.pending_goal = goal
+        self.chunk = chunk
+        self.building = self.build_chunks(goal, chunk)
+
+    def build_chunks(self, goal, chunk):
+        # The spare map is cleared in steps first, a few times larger than
+        # the search's, since clearing a cell costs far less than visiting one
+        pending, step = self.pending, chunk * CLEAR_RATIO
+        for first in range(0, len(pending), step):
+            last = min(first + step, len(pending))
+            pending[first:last] = [UNREACHABLE] * (last - first)
+            yield
+        yield from bfs_chunks(self.grid, goal[0], goal[1], pending, chunk)
+
+    def advance(self):
+        # One chunk of the pending rebuild; True once it has been swapped in
+        if self.building is None:
+            return False
+        for _ in self.building:
+            return False
+        self.distances, self.pending = self.pending, self.distances
+        self.goal, self.pending_goal, self.building = self.pending_goal, None, None
+        self.rebuilds += 1
+        if self.next_goal is not None:
+            goal, self.next_goal = self.next_goal, None
+            if goal != self.goal:
+                self.start(goal, self.chunk)
+        return True
+
+    def distance(self, x, y):
+        if not self.in_bounds(x, y):
+            return UNREACHABLE
+        return self.distances[y * self.cols + x]
+
+    def next_step(self, x, y):
+        # Neighbour that is strictly closer to the goal, or None when already
+        # there or cut off. Works from wall cells too, so enemies spawned
+        # inside a wall can still walk out.
+        best = None
+        best_distance = self.distance(x, y)
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            d = self.distance(nx, ny)
+            if d == UNREACHABLE:
+                continue
+            if best_distance == UNREACHABLE or d < best_distance:
+                best, best_distance = (nx, ny), d
+        return best
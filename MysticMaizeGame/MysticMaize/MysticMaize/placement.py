@@ -0,0 +1,59 @@
+from bisect import bisect_left
+
+from pathfinding import bfs_distances
+
+SAMPLE_ATTEMPTS = 32  # Random picks tried before falling back to a scan of every cell
+
+
+class OpenCells:
+    # Every open cell of a level, built once. Cells sit in an array for O(1)
+    # uniform picks and, sorted by their BFS distance from the start, in a
+    # second one where "at least d steps from the start" is a suffix.
+    # Other distance maps (such as the flow field around the player) can be
+    # passed to sample() with the same flat layout.
+    def __init__(self, grid, start):
+        self.cols = len(grid[0]) if grid else 0
+        self.cells = [(x, y) for y, row in enumerate(grid) for x, cell in enumerate(row) if cell == 0]
+        self.start_distances = bfs_distances(grid, *start)
+        self.by_start_distance = sorted(self.cells, key=self.from_start)
+        self.sorted_distances = [self.from_start(cell) for cell in self.by_start_distance]
+
+    def __len__(self):
+        return len(self.cells)
+
+    def from_start(self, cell):
+        return self.start_distances[cell[1] * self.cols + cell[0]]
+
+    def random(self, rng):
+        return self.cells[rng.randrange(len(self.cells))]
+
+    def sample(self, rng, min_distance=0, distances=None, exclude=(), spread=0, away=()):
+        # A random open cell at least min_distance BFS steps from the start
+        # (or from the goal of distances), not in exclude, and at least spread
+        # steps from every cell in away. Manhattan distance never exceeds the
+        # BFS distance, so it is enough to keep cells apart. Constraints that
+        # no cell meets are dropped, nearest first, so this always returns.
+        if distances is None:
+            pool = self.by_start_distance[bisect_left(self.sorted_distances, min_distance):]
+            distances, min_distance = self.start_distances, 0
+        else:
+            pool = self.cells
+
+        def fits(cell, spread):
+            x, y = cell
+            if distances[y * self.cols + x] < min_distance or cell in exclude:
+                return False
+            return all(abs(x - ax) + abs(y - ay) >= spread for ax, ay in away)
+
+        if pool:
+            for _ in range(SAMPLE_ATTEMPTS):
+                cell = pool[rng.randrange(len(pool))]
+                if fits(cell, spread):
+                    return cell
+        for candidates in ([cell for cell in pool if fits(cell, spread)],
+                           [cell for cell in pool if fits(cell, 0)],
+                           [cell for cell in self.cells if cell not in exclude],
+                           self.cells):
+            if candidates:
+                return candidates[rng.randrange(len(candidates))]
+        return None
@@ -0,0 +1,119 @@
+import csv
+import time
+from collections import deque
+
+# Named phases of a frame, in the order they appear in the CSV
+ZONES = ["events", "bullets", "enemies", "draw", "present", "idle"]
+# Time from pumping an input event to presenting the frame that reacts to it
+LATENCY = "input"
+
+
+class _Zone:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.current[self.name] += time.perf_counter_ns() - self.start
+        return False
+
+
+class _NullZone:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_ZONE = _NullZone()
+
+
+class FrameProfiler:
+    # Per-frame timings for named zones, kept over a rolling window of frames.
+    # While disabled, zone() hands back a shared no-op context manager.
+    def __init__(self, zones=ZONES, window=300, enabled=False):
+        self.zones = list(zones)
+        self.enabled = enabled
+        self.window = window
+        self.zone_objects = {name: _Zone(self, name) for name in self.zones}
+        self.samples = {name: deque(maxlen=window) for name in self.zones + [LATENCY]}
+        self.frame_samples = deque(maxlen=window)
+        self.current = dict.fromkeys(self.zones, 0)
+        self.latency = 0
+        self.frame_start = 0
+        self.frame = 0
+        self.csv_file = None
+        self.csv_writer = None
+
+    def zone(self, name):
+        if not self.enabled:
+            return NULL_ZONE
+        return self.zone_objects[name]
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.current = dict.fromkeys(self.zones, 0)
+        self.latency = 0
+        self.frame_start = time.perf_counter_ns()
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter_ns()
+
+    def record_latency(self, ns):
+        if self.enabled:
+            self.latency = ns
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        total = time.perf_counter_ns() - self.frame_start
+        self.frame += 1
+        self.frame_samples.append(total)
+        current = self.current
+        for name in self.zones:
+            self.samples[name].append(current[name])
+        # Only frames that answered an input contribute latency samples
+        if self.latency:
+            self.samples[LATENCY].append(self.latency)
+        if self.csv_writer:
+            self.csv_writer.writerow([self.frame, total] + [current[name] for name in self.zones] + [self.latency])
+        self.current = dict.fromkeys(self.zones, 0)
+        self.latency = 0
+
+    def percentiles(self, name=None):
+        # (p50, p95, p99) in milliseconds; name=None means the whole frame
+        samples = self.frame_samples if name is None else self.samples[name]
+        if not samples:
+            return 0.0, 0.0, 0.0
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return tuple(ordered[round(last * p)] / 1e6 for p in (0.50, 0.95, 0.99))
+
+    def stats(self):
+        report = {"frame": self.percentiles()}
+        for name in self.zones + [LATENCY]:
+            report[name] = self.percentiles(name)
+        return report
+
+    def open_csv(self, path):
+        self.close_csv()
+        self.csv_file = open(path, "w", newline="")
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_writer.writerow(["frame", "frame_ns"] + [f"{name}_ns" for name in self.zones + [LATENCY]])
+
+    def close_csv(self):
+        if self.csv_file:
+            self.csv_file.close()
+        self.csv_file = None
+        self.csv_writer = None
+
+
+# Used by code that runs without a game attached (bots, benchmarks, soak runs)
+NULL_PROFILER = FrameProfiler(enabled=False)
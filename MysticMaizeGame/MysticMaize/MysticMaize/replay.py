@@ -0,0 +1,147 @@
+import os
+import sys
+import time
+import zlib
+import struct
+import argparse
+
+from world import MazeWorld, Inputs, PLAYING, WON, LOST, TICK, TICK_RATE
+
+# A replay is a header and then 7-byte records, each stamped with the tick
+# it applies to. Inputs are only written when they change.
+MAGIC = b"MMRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBIHHH")  # magic, version, level, seed, rows, cols, tick rate
+RECORD = struct.Struct("<IBH")  # tick, kind, value
+INPUT = 0  # value: packed Inputs
+AI_UNITS = 1  # value: AI work done on a tick the budget cut short
+CHECKSUM = 2  # value: low 16 bits of the world checksum after the last tick
+END = 3  # value: final status
+STATUSES = [PLAYING, WON, LOST]
+SHOOT_BITS = ["up", "down", "left", "right"]
+
+
+def pack_inputs(inputs):
+    # Two bits per movement axis and one per shoot direction
+    value = (inputs.move_x + 1) | (inputs.move_y + 1) << 2
+    for bit, direction in enumerate(SHOOT_BITS):
+        if direction in inputs.shoot:
+            value |= 1 << (4 + bit)
+    return value
+
+
+def unpack_inputs(value):
+    shoot = [direction for bit, direction in enumerate(SHOOT_BITS) if value & 1 << (4 + bit)]
+    return Inputs((value & 3) - 1, (value >> 2 & 3) - 1, shoot)
+
+
+def checksum(world):
+    # Catches a replay that drifted from the recorded run
+    state = [world.ticks, world.player_x, world.player_y, world.collected_keys, len(world.bullets)]
+    for enemy in world.enemies:
+        state += [enemy.pos_x, enemy.pos_y]
+    return zlib.crc32(repr(state).encode())
+
+
+class Recorder:
+    # Collects one run's inputs in memory; nothing touches the disk until
+    # close(), so recording costs a comparison per tick
+    def __init__(self, path, world, seed):
+        self.path = path
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, world.level, seed, world.rows, world.cols, TICK_RATE))
+        self.last_input = None
+        self.closed = False
+
+    def record(self, world, inputs):
+        value = pack_inputs(inputs)
+        if value != self.last_input:
+            self.data += RECORD.pack(world.ticks, INPUT, value)
+            self.last_input = value
+        if world.ai_cut is not None:
+            self.data += RECORD.pack(world.ticks, AI_UNITS, min(world.ai_cut, 0xFFFF))
+
+    def close(self, world):
+        if self.closed:
+            return
+        self.closed = True
+        self.data += RECORD.pack(world.ticks, CHECKSUM, checksum(world) & 0xFFFF)
+        self.data += RECORD.pack(world.ticks, END, STATUSES.index(world.status))
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Written to a temporary name first, so a crash never leaves half a file
+        with open(self.path + ".tmp", "wb") as f:
+            f.write(self.data)
+        os.replace(self.path + ".tmp", self.path)
+
+
+class Replay:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, self.level, self.seed, rows, cols, tick_rate = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        if tick_rate != TICK_RATE:
+            raise ValueError(f"{path} was recorded at {tick_rate} ticks per second, not {TICK_RATE}")
+        self.size = (rows, cols)
+        self.inputs = {}
+        self.ai_units = {}
+        self.checksum = None
+        self.end_tick = 0
+        self.status = PLAYING
+        for tick, kind, value in RECORD.iter_unpack(data[HEADER.size:]):
+            if kind == INPUT:
+                self.inputs[tick] = unpack_inputs(value)
+            elif kind == AI_UNITS:
+                self.ai_units[tick] = value
+            elif kind == CHECKSUM:
+                self.checksum = value
+            elif kind == END:
+                self.end_tick, self.status = tick, STATUSES[value]
+
+    def run(self, profiler=None):
+        # Re-simulates the run without drawing or waiting; returns the world
+        world = MazeWorld(self.level, self.seed, self.size)
+        world.ai_budget_us = None
+        if profiler:
+            world.profiler = profiler
+        inputs = Inputs()
+        while world.ticks < self.end_tick and world.status == PLAYING:
+            tick = world.ticks + 1
+            inputs = self.inputs.get(tick, inputs)
+            world.ai_unit_limit = self.ai_units.get(tick)
+            world.step(TICK, inputs)
+        return world
+
+    def verify(self, world):
+        return (world.ticks == self.end_tick and world.status == self.status and
+                (self.checksum is None or checksum(world) & 0xFFFF == self.checksum))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate recorded runs headless, as fast as possible.")
+    parser.add_argument("replays", nargs="+", help="replay files written by main.py --record")
+    parser.add_argument("--repeat", type=int, default=1, help="times to run each replay (best time is shown)")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.replays:
+        replay = Replay(path)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            world = replay.run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        ok = replay.verify(world)
+        failed = failed or not ok
+        print(f"{path}: level {replay.level} seed {replay.seed} {world.status} after {world.ticks} ticks "
+              f"({world.ticks * TICK:.1f} s of play) in {best * 1000:.1f} ms, "
+              f"{world.ticks / best:.0f} ticks/s, {'matches' if ok else 'DESYNC'}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import json
+import math
+import time
+import queue
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    played_at TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    seed INTEGER,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (difficulty, duration);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+RESET = object()  # Queued in place of a run to delete every run
+STOP = object()
+
+
+class Run:
+    def __init__(self, difficulty, duration, seed=None, played_at=None):
+        self.difficulty = difficulty
+        self.duration = duration
+        self.seed = seed
+        self.played_at = time.strftime("%Y-%m-%d %H:%M:%S") if played_at is None else played_at
+        self.id = None  # Row id, set by the writer once the run is inserted
+
+
+class ScoreStore:
+    # Every finished run, kept in SQLite with an index for fastest-first
+    # queries per difficulty. Writes are queued to a background thread that
+    # commits each one as a transaction, so winning never waits on the disk
+    # and a crash loses at most the queued runs, never the file. Queued runs
+    # are merged into queries, so results never lag the game. Nothing
+    # touches the disk until open_async() or open().
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.pending = []
+        self.lock = threading.Lock()
+        self.writes = queue.Queue()
+        self.write_errors = 0
+        self.ready = threading.Event()
+        self.conn = None
+        self.writer = None
+
+    def open_async(self):
+        # The writer thread creates the schema and imports the old file
+        # before its first write; queries show only queued runs until then
+        self.writer = threading.Thread(target=self.write_loop, name="score-writer", daemon=True)
+        self.writer.start()
+
+    def open(self):
+        # Without threads (the web build) the same setup runs as a pending load
+        if not self.ready.is_set():
+            self.conn = self.connect()
+            self.setup(self.conn)
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets the menu read while the writer commits
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def setup(self, conn):
+        conn.executescript(SCHEMA)
+        if self.legacy_path:
+            self.migrate(conn, self.legacy_path)
+        self.ready.set()
+
+    def reader(self):
+        # Connection for queries, opened once the schema exists
+        if self.conn is None and self.ready.is_set():
+            self.conn = self.connect()
+        return self.conn
+
+    def migrate(self, conn, legacy_path):
+        # Best times from the old JSON file are imported once, as runs
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return
+        try:
+            with open(legacy_path) as f:
+                legacy = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            legacy = {}
+        with conn:
+            for difficulty, best in legacy.items():
+                if isinstance(best, dict) and math.isfinite(best.get("time", math.inf)):
+                    self.insert(conn, Run(difficulty, best["time"], None, best.get("date", "")))
+            conn.execute("INSERT INTO meta VALUES ('migrated_json', ?)", (os.path.basename(legacy_path),))
+
+    def insert(self, conn, run):
+        return conn.execute("INSERT INTO runs (played_at, difficulty, seed, duration) VALUES (?, ?, ?, ?)",
+                            (run.played_at, run.difficulty, run.seed, run.duration)).lastrowid
+
+    def record(self, difficulty, duration, seed=None):
+        run = Run(difficulty, duration, seed)
+        with self.lock:
+            self.pending.append(run)
+        self.submit(run)
+        return run
+
+    def reset(self):
+        with self.lock:
+            self.pending.clear()
+        self.submit(RESET)
+
+    def submit(self, item):
+        if self.writer:
+            self.writes.put(item)
+        else:
+            self.open()
+            self.write(self.conn, item)
+
+    def write_loop(self):
+        conn = self.connect()
+        self.setup(conn)
+        while True:
+            item = self.writes.get()
+            if item is STOP:
+                break
+            self.write(conn, item)
+        conn.close()
+
+    def write(self, conn, item):
+        # The lock only guards the pending list, so queries never wait on
+        # the commit. The id is set before the commit, letting a query
+        # tell a committed run from its still pending copy.
+        try:
+            with conn:
+                if item is RESET:
+                    conn.execute("DELETE FROM runs")
+                else:
+                    item.id = self.insert(conn, item)
+        except sqlite3.Error as e:
+            print(f"Could not save score: {e}")
+            self.write_errors += 1
+        with self.lock:
+            if item in self.pending:
+                self.pending.remove(item)
+
+    def top(self, difficulty, n=10):
+        with self.lock:
+            pending = [run for run in self.pending if run.difficulty == difficulty]
+        conn = self.reader()
+        rows = [] if conn is None else conn.execute(
+            "SELECT id, difficulty, duration, seed, played_at FROM runs WHERE difficulty = ? "
+            "ORDER BY duration LIMIT ?", (difficulty, n)).fetchall()
+        runs = []
+        for row in rows:
+            run = Run(*row[1:])
+            run.id = row[0]
+            runs.append(run)
+        committed = {run.id for run in runs}
+        runs += [run for run in pending if run.id is None or run.id not in committed]
+        runs.sort(key=lambda run: run.duration)
+        return runs[:n]
+
+    def best(self, difficulty):
+        runs = self.top(difficulty, 1)
+        return runs[0] if runs else None
+
+    def count(self):
+        with self.lock:
+            pending = list(self.pending)
+        conn = self.reader()
+        total, last = (0, None) if conn is None else conn.execute("SELECT COUNT(*), MAX(id) FROM runs").fetchone()
+        # Runs committed since the snapshot are already counted
+        return total + sum(1 for run in pending if run.id is None or last is None or run.id > last)
+
+    def close(self):
+        # Waits for queued runs to be committed
+        if self.writer:
+            self.writes.put(STOP)
+            self.writer.join()
+            self.writer = None
+        if self.conn is not None:
+            self.conn.close()
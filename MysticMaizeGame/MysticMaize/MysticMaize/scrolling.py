@@ -0,0 +1,51 @@
+import pygame
+
+TRANSPARENT = (0, 0, 0)  # Default colour key of content and starfield tiles
+
+
+class ScrollingContent:
+    # Tall content composed once onto one surface. draw() copies the visible
+    # window with a single blit, so scrolling costs the same for any length.
+    # Text is antialiased against background, which is then keyed out, so
+    # the content should be shown over that same colour.
+    def __init__(self, width, height, background=TRANSPARENT):
+        self.width = width
+        self.height = height
+        self.surface = pygame.Surface((width, max(1, height))).convert()
+        self.surface.fill(background)
+        self.surface.set_colorkey(background, pygame.RLEACCEL)
+
+    def blit(self, surface, pos):
+        return self.surface.blit(surface, pos)
+
+    def draw(self, target, scroll_y, dest, view_height):
+        # scroll_y may run past either end; the part outside the content is left empty
+        x, y = dest
+        top = int(scroll_y)
+        if top < 0:
+            y -= top
+            view_height += top
+            top = 0
+        if view_height > 0:
+            target.blit(self.surface, (x, y), (0, top, self.width, view_height))
+
+
+class Starfield:
+    # One parallax layer of stars, pre-drawn on a tile that repeats every
+    # period pixels. The tile carries one extra view of wrapped stars, so
+    # any window into it is a single blit.
+    def __init__(self, width, period, view_height, count, radius, rng, color=(255, 255, 255)):
+        self.width = width
+        self.period = period
+        self.view_height = view_height
+        self.tile = pygame.Surface((width, period + view_height)).convert()
+        self.tile.fill(TRANSPARENT)
+        for _ in range(count):
+            x, y = rng.randrange(width), rng.randrange(period)
+            while y < period + view_height:
+                pygame.draw.circle(self.tile, color, (x, y), radius)
+                y += period
+        self.tile.set_colorkey(TRANSPARENT, pygame.RLEACCEL)
+
+    def draw(self, target, offset, dest=(0, 0)):
+        target.blit(self.tile, dest, (0, int(offset) % self.period, self.width, self.view_height))
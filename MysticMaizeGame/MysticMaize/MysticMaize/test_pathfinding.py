@@ -0,0 +1,52 @@
+from pathfinding import FlowField
+
+# An open 8x8 room, so every rebuild takes several chunks of 4 cells
+GRID = [[0] * 8 for _ in range(8)]
+CHUNK = 4
+
+
+def finish(field):
+    while field.building:
+        field.advance()
+
+
+def test_return_to_goal_drops_pending_rebuild():
+    field = FlowField(GRID)
+    field.request(3, 3, CHUNK)
+    finish(field)
+    # A -> B -> A within one chunked rebuild
+    assert field.request(4, 3, CHUNK)
+    field.advance()
+    assert not field.request(3, 3, CHUNK)
+    assert field.building is None
+    finish(field)
+    assert field.goal == (3, 3)
+    assert field.distance(3, 3) == 0
+
+
+def test_same_pending_goal_keeps_rebuild():
+    field = FlowField(GRID)
+    field.request(3, 3, CHUNK)
+    finish(field)
+    field.request(4, 3, CHUNK)
+    building = field.building
+    assert not field.request(4, 3, CHUNK)
+    assert field.building is building
+    finish(field)
+    assert field.goal == (4, 3)
+
+
+def test_walking_goal_still_finishes_rebuilds():
+    # The goal moves on every few chunks, long before one rebuild is done
+    field = FlowField(GRID)
+    field.request(0, 0, CHUNK)
+    finish(field)
+    rebuilds = field.rebuilds
+    for step in range(1, 8 * 10):
+        if step % 10 == 0:
+            field.request(step // 10, step // 10, CHUNK)
+        field.advance()
+    assert field.rebuilds > rebuilds + 1
+    finish(field)
+    assert field.goal == (7, 7)
+    assert field.distance(0, 0) == 14
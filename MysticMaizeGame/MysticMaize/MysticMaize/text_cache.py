@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class FontRegistry:
+    # Loads each (file, size) once. Errors from pygame.font.Font are passed
+    # through so callers keep their own fallbacks.
+    def __init__(self):
+        self.fonts = {}
+
+    def get(self, path, size):
+        key = (path, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(path, size)
+            self.fonts[key] = font
+        return font
+
+
+class TextCache:
+    # LRU cache of rendered text surfaces. The returned surfaces are shared,
+    # so callers must only blit them, never draw onto them.
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.surfaces),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
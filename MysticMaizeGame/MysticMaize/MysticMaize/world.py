@@ -0,0 +1,295 @@
+import math
+import random
+from collections import deque
+
+import maze_gen
+from collision import WallMap, SpatialHash
+from bullets import BulletPool
+from pathfinding import FlowField
+from placement import OpenCells
+from ai import AIScheduler
+from profiler import NULL_PROFILER
+
+# World units are maze cells; the renderer decides how many pixels a cell is.
+PLAYER_SIZE = 0.8
+PLAYER_SPEED = 4.5  # cells per second
+ENEMY_SIZE = 0.8
+ENEMY_SPEED = 2.0
+ENEMY_CATCH_DISTANCE = 1.0
+BULLET_SIZE = 0.2
+BULLET_SPEED = 6.5
+MAX_BULLETS = 256
+FIRE_INTERVAL = 0.15  # Seconds between volleys while a shoot key is held
+GOAL_INSET = 0.35  # Part of the player that must overlap the goal cell
+NUM_KEYS = 3
+KEY_MIN_DISTANCE = 8  # BFS steps from the start to any key
+KEY_SPREAD = 6  # Steps kept between keys
+RESPAWN_MIN_DISTANCE = 8  # BFS steps between the player and a respawned enemy
+TICK_RATE = 120  # Simulation steps per second, independent of the frame rate
+TICK = 1 / TICK_RATE
+PLAN_LENGTH = 4  # Cells of path an enemy plans ahead
+AI_BUDGET_US = 1000  # Pathfinding time per step; the rest waits for later steps
+
+# Maze algorithm and grid size (rows, cols) for each level
+LEVEL_MAZES = {
+    1: ("backtracker", 21, 21),
+    2: ("prim", 21, 21),
+    3: ("kruskal", 21, 21),
+}
+
+PLAYING = "playing"
+WON = "won"
+LOST = "lost"
+
+SHOOT_DIRECTIONS = {
+    "up": (0, -1),
+    "down": (0, 1),
+    "left": (-1, 0),
+    "right": (1, 0),
+}
+
+
+class Inputs:
+    # One tick of player intent: a movement direction and the shoot keys held
+    def __init__(self, move_x=0, move_y=0, shoot=()):
+        self.move_x = move_x
+        self.move_y = move_y
+        self.shoot = shoot
+
+
+class Enemy:
+    def __init__(self, start_x, start_y):
+        self.start_x, self.start_y = start_x, start_y
+        self.x, self.y = start_x, start_y
+        self.pos_x, self.pos_y = float(start_x), float(start_y)
+        self.prev_x, self.prev_y = self.pos_x, self.pos_y
+        self.target_x, self.target_y = self.pos_x, self.pos_y
+        self.speed = ENEMY_SPEED
+        self.is_alive = True
+        self.is_visible = True
+        self.path = deque()
+        self.planned_at = 0
+        self.plan_field = None  # Flow field rebuild the path was planned on
+
+    def needs_plan(self, flow_field):
+        return not self.path or self.plan_field != flow_field.rebuilds
+
+    def replan(self, flow_field, tick):
+        # The next few cells downhill from the cell being walked to
+        self.path.clear()
+        x, y = self.x, self.y
+        for _ in range(PLAN_LENGTH):
+            next_cell = flow_field.next_step(x, y)
+            if next_cell is None:
+                break
+            self.path.append(next_cell)
+            x, y = next_cell
+        self.planned_at = tick
+        self.plan_field = flow_field.rebuilds
+
+    def follow_path(self, dt):
+        self.prev_x, self.prev_y = self.pos_x, self.pos_y
+        if not self.is_visible:
+            return
+
+        step = self.speed * dt
+        if abs(self.pos_x - self.target_x) < step and abs(self.pos_y - self.target_y) < step and self.path:
+            self.x, self.y = self.path.popleft()
+            self.target_x, self.target_y = float(self.x), float(self.y)
+
+        if self.pos_x < self.target_x:
+            self.pos_x += min(step, self.target_x - self.pos_x)
+        elif self.pos_x > self.target_x:
+            self.pos_x -= min(step, self.pos_x - self.target_x)
+
+        if self.pos_y < self.target_y:
+            self.pos_y += min(step, self.target_y - self.pos_y)
+        elif self.pos_y > self.target_y:
+            self.pos_y -= min(step, self.pos_y - self.target_y)
+
+    def check_collision(self, player_x, player_y):
+        if not self.is_visible:
+            return False
+        return math.hypot(self.pos_x - player_x, self.pos_y - player_y) < ENEMY_CATCH_DISTANCE
+
+
+class MazeWorld:
+    # Game rules without any pygame surfaces, sounds or windows. The renderer
+    # reads the state after each step() and drains self.events for effects.
+    def __init__(self, level, seed=None, size=None):
+        self.level = level
+        self.rng = random.Random(seed)
+        algorithm, self.rows, self.cols = LEVEL_MAZES[level]
+        if size:
+            self.rows, self.cols = size
+        self.start_pos = (3, 3)
+        self.grid = maze_gen.generate(algorithm, self.rows, self.cols, self.rng.random(), self.start_pos)
+        self.end_pos = (self.cols - 5, self.rows - 5)
+        self.grid[self.end_pos[1]][self.end_pos[0]] = 0
+        self.flow_field = FlowField(self.grid)
+        self.ai = AIScheduler(self.flow_field)
+        self.ai_budget_us = AI_BUDGET_US
+        # When the budget cuts AI work short, ai_cut holds the units done that
+        # step; a replay sets ai_unit_limit to repeat exactly that much work
+        self.ai_unit_limit = None
+        self.ai_cut = None
+        self.ticks = 0
+        self.wall_map = WallMap(self.grid, 1)
+        self.open_cells = OpenCells(self.grid, self.start_pos)
+
+        self.player_x, self.player_y = float(self.start_pos[0]), float(self.start_pos[1])
+        self.prev_player_x, self.prev_player_y = self.player_x, self.player_y
+        self.goal_x, self.goal_y = self.end_pos
+        self.can_shoot = level >= 2
+        self.needs_keys = level == 3
+        self.bullets = BulletPool(MAX_BULLETS)
+        self.fire_interval = FIRE_INTERVAL
+        self.fire_cooldown = 0.0
+        self.enemy_hash = SpatialHash(self.cols, self.rows)
+        self.collected_keys = 0
+        self.elapsed = 0.0
+        self.status = PLAYING
+        self.events = []
+        self.profiler = NULL_PROFILER
+
+        self.enemies = []
+        if level >= 2:
+            e = [
+                Enemy(self.cols // 2, self.rows // 2),
+                Enemy(self.cols - 2, self.rows - 2),
+                Enemy(self.cols // 2, self.rows // 4)
+            ]
+            self.rng.shuffle(e)
+            self.enemies = e
+            # Enemies start with a complete field; later ones are built in chunks
+            self.flow_field.rebuild(*self.start_pos)
+            self.index_enemies()
+        self.keys = []
+        if self.needs_keys:
+            self.keys = self.generate_key_positions(NUM_KEYS)
+
+    def generate_key_positions(self, num_keys):
+        key_positions = []
+        for _ in range(num_keys):
+            key_positions.append(self.open_cells.sample(
+                self.rng, KEY_MIN_DISTANCE, exclude=[self.start_pos, self.end_pos] + key_positions,
+                spread=KEY_SPREAD, away=key_positions))
+        return key_positions
+
+    def get_random_spawn(self, min_distance=0):
+        # Distances from the player come from the flow field the enemies share
+        if not min_distance:
+            return self.open_cells.random(self.rng)
+        distances = self.flow_field.distances if self.flow_field.goal else None
+        return self.open_cells.sample(self.rng, min_distance, distances)
+
+    def player_cell(self):
+        return int(self.player_x), int(self.player_y)
+
+    def drain_events(self):
+        events, self.events = self.events, []
+        return events
+
+    def step(self, dt, inputs):
+        if self.status != PLAYING:
+            return
+        self.ticks += 1
+        self.ai_cut = None
+        self.elapsed += dt
+        self.prev_player_x, self.prev_player_y = self.player_x, self.player_y
+
+        if self.can_shoot:
+            self.fire_cooldown = max(0.0, self.fire_cooldown - dt)
+            if inputs.shoot and self.fire_cooldown == 0:
+                for direction in inputs.shoot:
+                    self.shoot(direction)
+                self.fire_cooldown = self.fire_interval
+
+        speed = PLAYER_SPEED * dt
+        self.player_x += self.wall_map.sweep_x(self.player_x, self.player_y, PLAYER_SIZE, PLAYER_SIZE, inputs.move_x * speed)
+        self.player_y += self.wall_map.sweep_y(self.player_x, self.player_y, PLAYER_SIZE, PLAYER_SIZE, inputs.move_y * speed)
+
+        if self.can_shoot and len(self.bullets):
+            with self.profiler.zone("bullets"):
+                self.index_enemies()
+                self.move_bullets(dt)
+
+        with self.profiler.zone("enemies"):
+            if self.enemies:
+                self.update_enemies(dt)
+                self.index_enemies()
+                reach = ENEMY_CATCH_DISTANCE
+                for enemy in self.enemy_hash.query(self.player_x - reach, self.player_y - reach, 2 * reach, 2 * reach):
+                    if enemy.check_collision(self.player_x, self.player_y):
+                        self.status = LOST
+                        self.events.append("player_caught")
+                        return
+
+        if self.needs_keys:
+            player_cell = self.player_cell()
+            if player_cell in self.keys:
+                self.keys.remove(player_cell)
+                self.collected_keys += 1
+                self.events.append("key_pickup")
+
+        if self.player_on_goal() and (not self.needs_keys or self.collected_keys == NUM_KEYS):
+            self.status = WON
+            self.events.append("goal_reached")
+
+    def update_enemies(self, dt):
+        self.ai.request_field(*self.player_cell())
+        for enemy in self.enemies:
+            if enemy.needs_plan(self.flow_field):
+                self.ai.request(enemy)
+        units = self.ai.run(self.ai_budget_us, self.ai_unit_limit)
+        if self.ai.queue or self.flow_field.building:
+            self.ai_cut = units
+        for enemy in self.enemies:
+            enemy.follow_path(dt)
+
+    def player_on_goal(self):
+        x, y = self.player_x + GOAL_INSET, self.player_y + GOAL_INSET
+        size = PLAYER_SIZE - GOAL_INSET
+        return x < self.goal_x + 1 and self.goal_x < x + size and y < self.goal_y + 1 and self.goal_y < y + size
+
+    def index_enemies(self):
+        self.enemy_hash.clear()
+        for enemy in self.enemies:
+            self.enemy_hash.insert(enemy, enemy.pos_x, enemy.pos_y, ENEMY_SIZE)
+
+    def shoot(self, direction):
+        dx, dy = SHOOT_DIRECTIONS[direction]
+        x = self.player_x + (0.5 if dx == 0 else (1 if dx > 0 else 0))
+        y = self.player_y + (0.5 if dy == 0 else (1 if dy > 0 else 0))
+        if self.bullets.spawn(x, y, dx, dy):
+            self.events.append("shoot")
+
+    def move_bullets(self, dt):
+        pool = self.bullets
+        distance = BULLET_SPEED * dt
+        i = 0
+        while i < pool.count:
+            new_bx = pool.x[i] + distance * pool.dx[i]
+            new_by = pool.y[i] + distance * pool.dy[i]
+            if self.wall_map.is_wall(int(new_bx // 1), int(new_by // 1)):
+                pool.kill(i)
+                continue
+            hit_enemy = None
+            for enemy in self.enemy_hash.query(new_bx, new_by, BULLET_SIZE, BULLET_SIZE):
+                if (enemy.is_alive and
+                        new_bx < enemy.pos_x + ENEMY_SIZE and enemy.pos_x < new_bx + BULLET_SIZE and
+                        new_by < enemy.pos_y + ENEMY_SIZE and enemy.pos_y < new_by + BULLET_SIZE):
+                    hit_enemy = enemy
+                    break
+            if hit_enemy:
+                pool.kill(i)
+                self.events.append("enemy_killed")
+                hit_enemy.is_alive = False
+                self.enemies.remove(hit_enemy)
+                start_x, start_y = self.get_random_spawn(RESPAWN_MIN_DISTANCE)
+                new_enemy = Enemy(start_x, start_y)
+                self.enemies.append(new_enemy)
+                self.enemy_hash.insert(new_enemy, new_enemy.pos_x, new_enemy.pos_y, ENEMY_SIZE)
+                continue
+            pool.x[i], pool.y[i] = new_bx, new_by
+            i += 1